@@ -0,0 +1,241 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+# Ritmo padrão por host: requisições por segundo e rajada máxima
+TAXA_POR_HOST = 3.0
+CAPACIDADE_POR_HOST = 5
+
+# Tentativas por URL e backoff exponencial (segundos)
+MAX_TENTATIVAS = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAXIMO = 8.0
+
+# Disjuntor: falhas seguidas para abrir e tempo até testar o host de novo
+LIMITE_FALHAS = 5
+TEMPO_REABERTURA = 60.0
+
+# Status que indicam sobrecarga/instabilidade do host (vale tentar de novo)
+STATUS_REPETIVEIS = {429, 500, 502, 503, 504}
+
+
+class CircuitoAbertoError(Exception):
+    """O host falhou repetidamente e está temporariamente bloqueado"""
+
+
+class PrazoEsgotadoError(Exception):
+    """O prazo total da carga terminou antes da requisição"""
+
+
+class BaldeTokens:
+    def __init__(self, taxa=TAXA_POR_HOST, capacidade=CAPACIDADE_POR_HOST):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.tokens = float(capacidade)
+        self.atualizado_em = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reservar(self):
+        """Reserva um token e retorna quantos segundos esperar até poder usá-lo"""
+        with self._lock:
+            agora = time.monotonic()
+            self.tokens = min(self.capacidade,
+                              self.tokens + (agora - self.atualizado_em) * self.taxa)
+            self.atualizado_em = agora
+
+            # Saldo negativo = fila de espera já reservada por outras threads
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.taxa
+
+
+class DisjuntorCircuito:
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+    MEIO_ABERTO = "meio_aberto"
+
+    def __init__(self, limite_falhas=LIMITE_FALHAS, tempo_reabertura=TEMPO_REABERTURA):
+        self.limite_falhas = limite_falhas
+        self.tempo_reabertura = tempo_reabertura
+        self.estado = self.FECHADO
+        self.falhas_seguidas = 0
+        self.aberto_em = None
+        # Início da requisição de teste em andamento (meio aberto), ou None
+        self.sonda_em = None
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        """Indica se uma requisição pode ser feita agora
+
+        Meio aberto, só uma requisição de teste passa até o resultado dela ser
+        registrado. Se ela nunca for registrada (ex.: tarefa cancelada), outra
+        sonda é liberada depois de tempo_reabertura.
+        """
+        with self._lock:
+            if self.estado == self.FECHADO:
+                return True
+
+            agora = time.monotonic()
+            if self.estado == self.ABERTO:
+                if agora - self.aberto_em < self.tempo_reabertura:
+                    return False
+                # Depois do tempo de espera, deixa uma requisição de teste passar
+                self.estado = self.MEIO_ABERTO
+            elif self.sonda_em is not None and agora - self.sonda_em < self.tempo_reabertura:
+                return False
+
+            self.sonda_em = agora
+            return True
+
+    def registrar_sucesso(self):
+        """Fecha o circuito após uma resposta saudável"""
+        with self._lock:
+            self.estado = self.FECHADO
+            self.falhas_seguidas = 0
+            self.aberto_em = None
+            self.sonda_em = None
+
+    def registrar_falha(self):
+        """Conta a falha e abre o circuito ao atingir o limite"""
+        with self._lock:
+            self.falhas_seguidas += 1
+            self.sonda_em = None
+            if self.estado == self.MEIO_ABERTO or self.falhas_seguidas >= self.limite_falhas:
+                self.estado = self.ABERTO
+                self.aberto_em = time.monotonic()
+
+
+class AgendadorRequisicoes:
+    def __init__(self, sessao=None, taxa=TAXA_POR_HOST, capacidade=CAPACIDADE_POR_HOST,
+                 max_tentativas=MAX_TENTATIVAS, backoff_base=BACKOFF_BASE,
+                 backoff_maximo=BACKOFF_MAXIMO, limite_falhas=LIMITE_FALHAS,
+                 tempo_reabertura=TEMPO_REABERTURA):
+        # A sessão pode ser trocada por um stub local nos testes de carga
+        self._sessao = sessao
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.max_tentativas = max_tentativas
+        self.backoff_base = backoff_base
+        self.backoff_maximo = backoff_maximo
+        self.limite_falhas = limite_falhas
+        self.tempo_reabertura = tempo_reabertura
+
+        self._baldes = {}
+        self._disjuntores = {}
+        self._lock = threading.Lock()
+
+    @property
+    def sessao(self):
+        """Sessão HTTP com conexões reaproveitadas, criada no primeiro uso"""
+        if self._sessao is None:
+            import requests
+            self._sessao = requests.Session()
+        return self._sessao
+
+    def _estado_host(self, host):
+        """Retorna o balde de tokens e o disjuntor do host"""
+        with self._lock:
+            if host not in self._baldes:
+                self._baldes[host] = BaldeTokens(self.taxa, self.capacidade)
+                self._disjuntores[host] = DisjuntorCircuito(
+                    self.limite_falhas, self.tempo_reabertura)
+            return self._baldes[host], self._disjuntores[host]
+
+    def controles_host(self, url):
+        """Balde de tokens e disjuntor do host da URL (também usados pelo carregador assíncrono)"""
+        return self._estado_host(urlsplit(url).netloc)
+
+    def _tempo_restante(self, prazo):
+        """Segundos até o prazo (None = sem prazo)"""
+        return None if prazo is None else prazo - time.monotonic()
+
+    def calcular_backoff(self, tentativa, cabecalhos=None):
+        """Backoff exponencial com jitter completo, respeitando o Retry-After
+
+        Só o backoff próprio é limitado a backoff_maximo: o Retry-After pedido pelo
+        servidor vale inteiro (quem chama desiste se ele passa do prazo da carga).
+        """
+        espera = random.uniform(0, min(self.backoff_maximo,
+                                       self.backoff_base * 2 ** tentativa))
+
+        if cabecalhos is not None:
+            try:
+                espera = max(espera, float(cabecalhos.get('Retry-After', 0)))
+            except (TypeError, ValueError):
+                pass
+
+        return espera
+
+    def obter(self, url, timeout=20, prazo=None, stream=False):
+        """Faz um GET com limite de taxa por host, novas tentativas e disjuntor
+
+        `prazo` é um instante de time.monotonic() que limita o tempo total gasto.
+        Com `stream=True` o corpo não é baixado: quem chama decide quanto ler.
+        """
+        import requests
+
+        balde, disjuntor = self.controles_host(url)
+        resposta = None
+        ultimo_erro = None
+
+        for tentativa in range(self.max_tentativas):
+            if not disjuntor.permitir():
+                raise CircuitoAbertoError(f"Circuito aberto para {url}")
+
+            espera = balde.reservar()
+            restante = self._tempo_restante(prazo)
+            if restante is not None and espera >= restante:
+                raise PrazoEsgotadoError(f"Prazo esgotado antes de {url}")
+            if espera > 0:
+                time.sleep(espera)
+
+            timeout_efetivo = timeout if restante is None else min(
+                timeout, restante - espera)
+
+            try:
+                resposta = self.sessao.get(
+                    url, timeout=timeout_efetivo, stream=stream)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                disjuntor.registrar_falha()
+                resposta = None
+                ultimo_erro = e
+            else:
+                if resposta.status_code not in STATUS_REPETIVEIS:
+                    # 200 ou erro definitivo (ex.: 404): o host está respondendo
+                    disjuntor.registrar_sucesso()
+                    return resposta
+                disjuntor.registrar_falha()
+                if tentativa + 1 < self.max_tentativas:
+                    # Libera a conexão antes de tentar de novo
+                    resposta.close()
+
+            if tentativa + 1 < self.max_tentativas:
+                backoff = self.calcular_backoff(
+                    tentativa, resposta.headers if resposta is not None else None)
+                restante = self._tempo_restante(prazo)
+                if restante is not None and backoff >= restante:
+                    break
+                time.sleep(backoff)
+
+        # Sem sucesso: devolve a última resposta (ex.: 429) ou o último erro de rede
+        if resposta is not None:
+            return resposta
+        if ultimo_erro is not None:
+            raise ultimo_erro
+        raise PrazoEsgotadoError(f"Prazo esgotado durante {url}")
+
+
+_agendador_padrao = None
+_lock_agendador = threading.Lock()
+
+
+def obter_agendador_padrao():
+    """Agendador compartilhado pelo processo (os limites valem para todas as sessões)"""
+    global _agendador_padrao
+    with _lock_agendador:
+        if _agendador_padrao is None:
+            _agendador_padrao = AgendadorRequisicoes()
+        return _agendador_padrao
@@ -0,0 +1,262 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+from utils import categorizar_status_serie, marcar_datas_suspeitas, validar_texto_serie
+
+
+# Variável de ambiente com o caminho do banco local; sem ela o armazém fica desligado
+VARIAVEL_ARMAZEM = "DASH_SHEETS_ARMAZEM"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    aba TEXT NOT NULL,
+    vendedor TEXT NOT NULL,
+    data TEXT NOT NULL,
+    aluno TEXT,
+    telefone TEXT,
+    status TEXT,
+    status_categoria TEXT NOT NULL,
+    tem_nome INTEGER NOT NULL,
+    tem_telefone INTEGER NOT NULL,
+    carregado_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_leads_aba_vendedor_data
+    ON leads (aba, vendedor, data);
+CREATE INDEX IF NOT EXISTS idx_leads_data
+    ON leads (data);
+CREATE TABLE IF NOT EXISTS cargas (
+    aba TEXT NOT NULL,
+    vendedor TEXT NOT NULL,
+    carregado_em REAL NOT NULL,
+    PRIMARY KEY (aba, vendedor)
+);
+"""
+
+
+def _texto_ou_nulo(serie):
+    """Converte uma coluna para texto, mantendo valores ausentes como NULL"""
+    return serie.astype(object).where(serie.notna(), None).map(
+        lambda valor: valor if valor is None else str(valor))
+
+
+class ArmazemLeads:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        diretorio = os.path.dirname(os.path.abspath(caminho))
+        os.makedirs(diretorio, exist_ok=True)
+
+        with self._conectar() as conexao:
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.executescript(ESQUEMA)
+
+            # Bancos anteriores à tabela de cargas: a última carga de cada fonte
+            # é a que tem o maior carregado_em
+            if conexao.execute("SELECT 1 FROM cargas LIMIT 1").fetchone() is None:
+                conexao.execute(
+                    "INSERT OR IGNORE INTO cargas "
+                    "SELECT aba, vendedor, MAX(carregado_em) FROM leads GROUP BY aba, vendedor")
+
+    @contextmanager
+    def _conectar(self):
+        """Abre uma conexão nova (conexões SQLite não são compartilhadas entre threads)"""
+        conexao = sqlite3.connect(self.caminho, timeout=30)
+        try:
+            with conexao:
+                yield conexao
+        finally:
+            conexao.close()
+
+    def salvar_leads(self, df):
+        """Grava os leads processados, substituindo o período recarregado de cada (aba, vendedor)
+
+        A carga fica registrada em `cargas`: com ultima_carga=True as leituras
+        devolvem exatamente as linhas dela, como o loader as entregou.
+        """
+        if df.empty:
+            return 0
+
+        df = df.assign(Data=pd.to_datetime(df['Data'], errors='coerce'))
+        df = df.dropna(subset=['Data'])
+        if df.empty:
+            return 0
+
+        registros = pd.DataFrame({
+            'aba': df['Aba'].astype(str),
+            'vendedor': df['Vendedor'].astype(str),
+            'data': df['Data'].dt.strftime('%Y-%m-%d'),
+            'aluno': _texto_ou_nulo(df['Aluno']),
+            'telefone': _texto_ou_nulo(df['Telefone']),
+            'status': _texto_ou_nulo(df['Status']),
+            'status_categoria': categorizar_status_serie(df['Status']),
+            'tem_nome': validar_texto_serie(df['Aluno']).astype(int),
+            'tem_telefone': validar_texto_serie(df['Telefone']).astype(int),
+            'carregado_em': time.time()
+        })
+
+        # Só o intervalo de datas que veio da planilha é substituído: o histórico
+        # de anos anteriores da mesma aba continua no armazém. Datas suspeitas
+        # (ex.: ano digitado errado) não contam no intervalo, senão um único
+        # "2015" apagaria anos de histórico; essas linhas são trocadas pela chave exata.
+        suspeitas = self._datas_suspeitas(df).to_numpy()
+        periodos = registros[~suspeitas].groupby(['aba', 'vendedor'])['data'].agg(['min', 'max'])
+        chaves_suspeitas = registros.loc[
+            suspeitas, ['aba', 'vendedor', 'data', 'aluno', 'telefone']]
+
+        with self._conectar() as conexao:
+            conexao.executemany(
+                "DELETE FROM leads WHERE aba = ? AND vendedor = ? AND data BETWEEN ? AND ?",
+                [(aba, vendedor, inicio, fim)
+                 for (aba, vendedor), (inicio, fim) in periodos.iterrows()]
+            )
+            conexao.executemany(
+                "DELETE FROM leads WHERE aba = ? AND vendedor = ? AND data = ? "
+                "AND aluno IS ? AND telefone IS ?",
+                chaves_suspeitas.itertuples(index=False, name=None)
+            )
+            conexao.executemany(
+                "INSERT INTO leads VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                registros.itertuples(index=False, name=None)
+            )
+            conexao.executemany(
+                "INSERT OR REPLACE INTO cargas VALUES (?, ?, ?)",
+                registros[['aba', 'vendedor', 'carregado_em']].drop_duplicates().itertuples(
+                    index=False, name=None)
+            )
+
+        return len(registros)
+
+    def _datas_suspeitas(self, df):
+        """Marca as datas fora do período da aba (usa a marcação do loader, se houver)"""
+        if 'Data_Suspeita' in df.columns:
+            return df['Data_Suspeita'].fillna(False).astype(bool)
+
+        suspeitas = pd.Series(False, index=df.index)
+        for aba, indices in df.groupby('Aba').groups.items():
+            suspeitas[indices] = marcar_datas_suspeitas(df.loc[indices, 'Data'], aba)
+        return suspeitas
+
+    def _montar_filtro(self, aba=None, vendedores=None, data_inicio=None, data_fim=None,
+                       ultima_carga=False):
+        """Monta a cláusula WHERE e os parâmetros a partir dos filtros
+
+        Com ultima_carga=True só entram as linhas da carga mais recente de cada
+        (aba, vendedor): o mesmo conjunto que o loader mostrou, sem os anos
+        anteriores da mesma aba e com as datas suspeitas que vieram na planilha.
+        """
+        condicoes = []
+        parametros = []
+
+        if ultima_carga:
+            condicoes.append(
+                "carregado_em = (SELECT cargas.carregado_em FROM cargas "
+                "WHERE cargas.aba = leads.aba AND cargas.vendedor = leads.vendedor)")
+
+        if aba:
+            condicoes.append("aba = ?")
+            parametros.append(aba)
+
+        if vendedores:
+            condicoes.append(
+                f"vendedor IN ({', '.join('?' for _ in vendedores)})")
+            parametros.extend(vendedores)
+
+        if data_inicio and data_fim:
+            condicoes.append("data BETWEEN ? AND ?")
+            parametros.extend([
+                pd.to_datetime(data_inicio).strftime('%Y-%m-%d'),
+                pd.to_datetime(data_fim).strftime('%Y-%m-%d')
+            ])
+
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        return where, parametros
+
+    def carregar_leads(self, aba=None, vendedores=None, data_inicio=None, data_fim=None,
+                       ultima_carga=False):
+        """Lê os leads armazenados no mesmo formato produzido pelo loader"""
+        where, parametros = self._montar_filtro(
+            aba, vendedores, data_inicio, data_fim, ultima_carga)
+
+        with self._conectar() as conexao:
+            df = pd.read_sql_query(
+                f"SELECT data, aluno, telefone, status, vendedor, aba FROM leads {where}",
+                conexao, params=parametros)
+
+        df.columns = ['Data', 'Aluno', 'Telefone', 'Status', 'Vendedor', 'Aba']
+        df['Data'] = pd.to_datetime(df['Data'], format='%Y-%m-%d')
+        return df
+
+    def calcular_kpis(self, aba=None, vendedores=None, data_inicio=None, data_fim=None,
+                      ultima_carga=False):
+        """Calcula os mesmos KPIs do DataProcessor diretamente em SQL"""
+        where, parametros = self._montar_filtro(
+            aba, vendedores, data_inicio, data_fim, ultima_carga)
+
+        with self._conectar() as conexao:
+            linha = conexao.execute(f"""
+                SELECT
+                    COUNT(*),
+                    COALESCE(SUM(tem_nome), 0),
+                    COALESCE(SUM(tem_telefone), 0),
+                    COALESCE(SUM(status IS NOT NULL), 0),
+                    COALESCE(SUM(status_categoria = 'Fechado'), 0),
+                    COALESCE(SUM(status_categoria = 'Perdido'), 0),
+                    COALESCE(SUM(status_categoria = 'Em Progresso'), 0)
+                FROM leads {where}
+            """, parametros).fetchone()
+
+        (total_leads, leads_com_nome, leads_com_telefone, leads_com_status,
+         vendas_fechadas, leads_perdidos, leads_progresso) = linha
+
+        taxa_conversao = (vendas_fechadas / total_leads *
+                          100) if total_leads > 0 else 0
+
+        return {
+            'total_leads': total_leads,
+            'leads_com_nome': leads_com_nome,
+            'leads_com_telefone': leads_com_telefone,
+            'leads_com_status': leads_com_status,
+            'vendas_fechadas': vendas_fechadas,
+            'leads_perdidos': leads_perdidos,
+            'taxa_conversao': taxa_conversao,
+            'funil_total': total_leads,
+            'funil_convertidos': vendas_fechadas,
+            'funil_progresso': leads_progresso,
+            'funil_perdidos': leads_perdidos
+        }
+
+    def obter_dados_por_vendedor(self, aba=None, vendedores=None, data_inicio=None, data_fim=None,
+                                 ultima_carga=False):
+        """Calcula as métricas por vendedor em SQL"""
+        where, parametros = self._montar_filtro(
+            aba, vendedores, data_inicio, data_fim, ultima_carga)
+
+        with self._conectar() as conexao:
+            vendedor_stats = pd.read_sql_query(f"""
+                SELECT
+                    vendedor AS Vendedor,
+                    COUNT(aluno) AS Total_Leads,
+                    SUM(status_categoria = 'Fechado') AS Vendas_Fechadas,
+                    SUM(status_categoria = 'Perdido') AS Leads_Perdidos
+                FROM leads {where}
+                GROUP BY vendedor
+                ORDER BY vendedor
+            """, conexao, params=parametros)
+
+        if vendedor_stats.empty:
+            return pd.DataFrame()
+
+        vendedor_stats['Taxa_Conversao'] = (
+            vendedor_stats['Vendas_Fechadas'] /
+            vendedor_stats['Total_Leads'] * 100
+        ).fillna(0)
+
+        return vendedor_stats
+
+
+def obter_armazem_configurado():
+    """Cria o armazém a partir da variável de ambiente, ou None se não configurado"""
+    caminho = os.environ.get(VARIAVEL_ARMAZEM)
+    return ArmazemLeads(caminho) if caminho else None
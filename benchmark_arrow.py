@@ -0,0 +1,120 @@
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from data_processor import DataProcessor
+from gerador_sintetico import CABECALHO_PLANILHA, gerar_dados_sinteticos
+from leitura_planilhas import ler_csv, limpar_planilha
+
+
+def gerar_corpos_csv(n_linhas, n_vendedores, semente):
+    """Gera o corpo CSV (bytes) de cada vendedor, como viria do Google Sheets"""
+    df = gerar_dados_sinteticos(n_linhas=n_linhas, n_vendedores=n_vendedores, semente=semente)
+
+    corpos = {}
+    for vendedor, df_vendedor in df.groupby('Vendedor'):
+        planilha = pd.DataFrame({
+            CABECALHO_PLANILHA[0]: df_vendedor['Data'].to_numpy(),
+            CABECALHO_PLANILHA[1]: df_vendedor['Aluno'].to_numpy(),
+            CABECALHO_PLANILHA[2]: df_vendedor['Telefone'].to_numpy(),
+            CABECALHO_PLANILHA[3]: '',
+            CABECALHO_PLANILHA[4]: df_vendedor['Status'].to_numpy()
+        })
+        corpos[vendedor] = planilha.to_csv(index=False).encode('utf-8')
+    return corpos
+
+
+def executar_pipeline(corpos, usar_arrow, aba="Setembro"):
+    """Do corpo da resposta até os KPIs, sem rede; retorna (processor, kpis, por_vendedor)"""
+    dados = []
+    for vendedor, corpo in corpos.items():
+        conteudo = corpo if usar_arrow else corpo.decode('utf-8')
+        df = ler_csv(conteudo, usar_arrow)
+        dados.append(limpar_planilha(df, vendedor, aba, usar_arrow)[0])
+
+    processor = DataProcessor(pd.concat(dados, ignore_index=True))
+    kpis = processor.calcular_kpis(processor.df)
+    por_vendedor = processor.obter_dados_por_vendedor(processor.df)
+    return processor, kpis, por_vendedor
+
+
+def medir_tempo(corpos, usar_arrow, repeticoes=3):
+    """Menor duração do pipeline entre as repetições, sem nenhum rastreamento ativo"""
+    duracoes = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = executar_pipeline(corpos, usar_arrow)
+        duracoes.append(time.perf_counter() - inicio)
+    return resultado, min(duracoes)
+
+
+def medir_memoria(corpos, usar_arrow):
+    """Pico de memória do pipeline; roda num processo novo para não herdar picos anteriores
+
+    Retorna (pico_python, pico_arrow, pico_rss) em bytes: o tracemalloc só vê o
+    heap do Python, o pool do pyarrow guarda os buffers das colunas Arrow e o
+    RSS máximo do processo cobre os dois (e também o custo das importações).
+    """
+    import pyarrow as pa
+
+    tracemalloc.start()
+    executar_pipeline(corpos, usar_arrow)
+    _, pico_python = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    pico_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':
+        pico_rss *= 1024  # Linux informa em KiB
+    return pico_python, pa.default_memory_pool().max_memory(), pico_rss
+
+
+def medir(corpos, usar_arrow, repeticoes=3):
+    """Mede tempo e pico de memória do pipeline em execuções separadas"""
+    resultado, duracao = medir_tempo(corpos, usar_arrow, repeticoes)
+
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+        memoria = executor.submit(medir_memoria, corpos, usar_arrow).result()
+
+    memoria_final = resultado[0].df.memory_usage(deep=True).sum()
+    return resultado, duracao, memoria, memoria_final
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara o pipeline de objetos com o modo Arrow (tempo, memória e resultados)")
+    parser.add_argument('--linhas', type=int, default=200_000)
+    parser.add_argument('--vendedores', type=int, default=6)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--repeticoes', type=int, default=3,
+                        help="Execuções cronometradas por caminho (vale a mais rápida)")
+    args = parser.parse_args()
+
+    corpos = gerar_corpos_csv(args.linhas, args.vendedores, args.semente)
+
+    medicoes = {}
+    for nome, usar_arrow in (("objetos", False), ("arrow", True)):
+        medicoes[nome] = medir(corpos, usar_arrow, args.repeticoes)
+        _, duracao, (pico_python, pico_arrow, pico_rss), memoria_final = medicoes[nome]
+        print(f"{nome:>8}: {duracao:6.2f}s | pico Python {pico_python / 2**20:7.1f} MiB"
+              f" | pico Arrow {pico_arrow / 2**20:7.1f} MiB"
+              f" | pico RSS {pico_rss / 2**20:7.1f} MiB"
+              f" | DataFrame final {memoria_final / 2**20:7.1f} MiB")
+
+    (_, kpis_obj, vendedores_obj), *_ = medicoes["objetos"]
+    (_, kpis_arrow, vendedores_arrow), *_ = medicoes["arrow"]
+
+    # Os dois caminhos precisam chegar exatamente aos mesmos agregados
+    if kpis_obj != kpis_arrow:
+        raise SystemExit(f"KPIs divergentes:\n{kpis_obj}\n{kpis_arrow}")
+    pd.testing.assert_frame_equal(vendedores_obj, vendedores_arrow, check_dtype=False)
+    print("Resultados idênticos nos dois caminhos")
+
+
+if __name__ == "__main__":
+    main()
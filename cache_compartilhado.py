@@ -0,0 +1,385 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+
+# Backend do cache das fontes: "memoria" (padrão), "dir:/caminho" ou "redis://host:porta/db"
+VARIAVEL_CACHE = "DASH_SHEETS_CACHE"
+
+# Tempo máximo (segundos) esperando outra réplica terminar a atualização de uma fonte
+ESPERA_TRAVA = 60
+
+# Validade de uma trava: se a réplica que a obteve cair, outra assume depois disso
+VALIDADE_TRAVA = 150
+
+# Validade das entradas no Redis (o TTL de cada fonte é verificado pelo loader)
+VALIDADE_ENTRADA = 24 * 60 * 60
+
+INTERVALO_TRAVA = 0.1
+
+# Tempo máximo (segundos) de conexão e de cada comando no Redis: com o servidor
+# fora do ar, a carga segue sem cache em vez de ficar parada
+TEMPO_LIMITE_REDIS = 2
+
+# Libera a trava só se ela ainda for desta réplica (GET e DEL numa operação só)
+SCRIPT_LIBERAR_TRAVA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Chave dos metadados da entrada (fingerprint, instante) no schema Arrow
+CHAVE_METADADOS = b'dash_sheets'
+
+logger = logging.getLogger(__name__)
+
+
+def serializar_entrada(entrada):
+    """Converte a entrada (fingerprint, instante, df) em bytes no formato Arrow IPC
+
+    Os backends compartilhados não usam pickle: ler o cache de outra réplica não
+    pode executar código. Retorna None se o DataFrame não cabe em um schema Arrow.
+    """
+    import pyarrow as pa
+
+    fingerprint, instante, df = entrada
+    metadados = {
+        'fingerprint': fingerprint,
+        'instante': instante,
+        # Colunas pd.ArrowDtype (modo Arrow) voltam com o mesmo tipo
+        'colunas_arrow': [coluna for coluna, tipo in df.dtypes.items()
+                          if isinstance(tipo, pd.ArrowDtype)],
+    }
+
+    try:
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowException, TypeError, ValueError) as e:
+        logger.warning("Entrada fora do cache compartilhado (%s)", e)
+        return None
+
+    tabela = tabela.replace_schema_metadata({
+        **(tabela.schema.metadata or {}),
+        CHAVE_METADADOS: json.dumps(metadados).encode('utf-8'),
+    })
+    saida = pa.BufferOutputStream()
+    opcoes = pa.ipc.IpcWriteOptions(compression='zstd')
+    with pa.ipc.new_stream(saida, tabela.schema, options=opcoes) as escritor:
+        escritor.write_table(tabela)
+    return saida.getvalue().to_pybytes()
+
+
+def desserializar_entrada(dados):
+    """Lê uma entrada gravada por serializar_entrada; retorna None se estiver corrompida"""
+    import pyarrow as pa
+
+    try:
+        tabela = pa.ipc.open_stream(dados).read_all()
+        metadados = json.loads(tabela.schema.metadata[CHAVE_METADADOS])
+        df = tabela.to_pandas()
+    except (pa.ArrowException, KeyError, TypeError, ValueError):
+        return None
+
+    for coluna in df.columns:
+        if coluna in metadados['colunas_arrow']:
+            df[coluna] = df[coluna].astype(pd.ArrowDtype(tabela.schema.field(coluna).type))
+        elif df[coluna].dtype == object:
+            # Células vazias voltam como NaN, como vieram do read_csv
+            df[coluna] = df[coluna].where(df[coluna].notna(), np.nan)
+
+    return metadados['fingerprint'], metadados['instante'], df
+
+
+class CacheMemoria:
+    """Cache do próprio processo: cada réplica tem a sua cópia"""
+
+    def __init__(self, espera_trava=ESPERA_TRAVA):
+        self.espera_trava = espera_trava
+        self._entradas = {}
+        self._travas = {}
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        """Retorna o valor guardado na chave, ou None"""
+        with self._lock:
+            return self._entradas.get(chave)
+
+    def salvar(self, chave, valor):
+        """Guarda o valor na chave"""
+        with self._lock:
+            self._entradas[chave] = valor
+
+    @contextmanager
+    def trava(self, chave):
+        """Só uma sessão atualiza a chave por vez; retorna False se a espera esgotou"""
+        with self._lock:
+            trava = self._travas.setdefault(chave, threading.Lock())
+
+        obtida = trava.acquire(timeout=self.espera_trava)
+        try:
+            yield obtida
+        finally:
+            if obtida:
+                trava.release()
+
+    def limpar(self):
+        """Descarta todas as entradas"""
+        with self._lock:
+            self._entradas.clear()
+
+
+class CacheDiretorio:
+    """Cache em um diretório compartilhado entre réplicas (ex.: volume de rede)
+
+    Cada chave vira um arquivo Arrow IPC gravado de forma atômica; as travas usam
+    flock em arquivos .lock ao lado. Falhas de disco viram falta no cache.
+    """
+
+    def __init__(self, diretorio, espera_trava=ESPERA_TRAVA):
+        self.diretorio = diretorio
+        self.espera_trava = espera_trava
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, chave, extensao):
+        nome = hashlib.sha1(chave.encode('utf-8')).hexdigest()
+        return os.path.join(self.diretorio, f"{nome}.{extensao}")
+
+    def obter(self, chave):
+        """Retorna o valor guardado na chave, ou None"""
+        try:
+            with open(self._caminho(chave, 'arrow'), 'rb') as arquivo:
+                return desserializar_entrada(arquivo.read())
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("Cache em disco indisponível ao ler %s: %s", chave, e)
+            return None
+
+    def salvar(self, chave, valor):
+        """Grava em arquivo temporário e troca de uma vez: leitores nunca veem arquivo pela metade"""
+        dados = serializar_entrada(valor)
+        if dados is None:
+            return
+
+        try:
+            descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix='.tmp')
+        except OSError as e:
+            logger.warning("Cache em disco indisponível ao gravar %s: %s", chave, e)
+            return
+
+        try:
+            with os.fdopen(descritor, 'wb') as arquivo:
+                arquivo.write(dados)
+            os.replace(temporario, self._caminho(chave, 'arrow'))
+        except OSError as e:
+            logger.warning("Cache em disco indisponível ao gravar %s: %s", chave, e)
+            try:
+                os.unlink(temporario)
+            except OSError:
+                pass
+
+    @contextmanager
+    def trava(self, chave):
+        """Só uma réplica atualiza a chave por vez; retorna False se a espera esgotou"""
+        import fcntl
+
+        try:
+            arquivo = open(self._caminho(chave, 'lock'), 'a')
+        except OSError as e:
+            logger.warning("Cache em disco indisponível: %s segue sem trava (%s)", chave, e)
+            yield False
+            return
+
+        limite = time.monotonic() + self.espera_trava
+        obtida = False
+        try:
+            while True:
+                try:
+                    fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    obtida = True
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= limite:
+                        break
+                    time.sleep(INTERVALO_TRAVA)
+                except OSError as e:
+                    logger.warning("Cache em disco indisponível: %s segue sem trava (%s)",
+                                   chave, e)
+                    break
+
+            yield obtida
+        finally:
+            if obtida:
+                fcntl.flock(arquivo, fcntl.LOCK_UN)
+            arquivo.close()
+
+    def limpar(self):
+        """Descarta todas as entradas"""
+        try:
+            nomes = os.listdir(self.diretorio)
+        except OSError as e:
+            logger.warning("Cache em disco indisponível ao limpar: %s", e)
+            return
+
+        for nome in nomes:
+            if nome.endswith('.arrow'):
+                try:
+                    os.unlink(os.path.join(self.diretorio, nome))
+                except OSError:
+                    pass
+
+
+class CacheRedis:
+    """Cache em um servidor com protocolo Redis, compartilhado entre réplicas
+
+    Aceita um cliente pronto (ex.: fakeredis ou um servidor local em testes).
+    Se o servidor cair, as leituras viram falta no cache, as gravações são
+    descartadas e as travas não são obtidas: a carga segue direto nas planilhas.
+    """
+
+    def __init__(self, url=None, cliente=None, prefixo="dash_sheets:",
+                 espera_trava=ESPERA_TRAVA, validade_trava=VALIDADE_TRAVA):
+        # Importado só quando o backend Redis é usado
+        import redis
+
+        if cliente is None:
+            cliente = redis.Redis.from_url(
+                url, socket_timeout=TEMPO_LIMITE_REDIS,
+                socket_connect_timeout=TEMPO_LIMITE_REDIS)
+
+        self.cliente = cliente
+        self.prefixo = prefixo
+        self.espera_trava = espera_trava
+        self.validade_trava = validade_trava
+        self.erros_backend = (redis.exceptions.RedisError, OSError)
+        self._liberar_trava = cliente.register_script(SCRIPT_LIBERAR_TRAVA)
+
+    def obter(self, chave):
+        """Retorna o valor guardado na chave, ou None"""
+        try:
+            dados = self.cliente.get(self.prefixo + chave)
+        except self.erros_backend as e:
+            logger.warning("Redis indisponível ao ler %s: %s", chave, e)
+            return None
+
+        if dados is None:
+            return None
+        return desserializar_entrada(dados)
+
+    def salvar(self, chave, valor):
+        """Guarda o valor na chave"""
+        dados = serializar_entrada(valor)
+        if dados is None:
+            return
+
+        try:
+            self.cliente.set(self.prefixo + chave, dados, ex=VALIDADE_ENTRADA)
+        except self.erros_backend as e:
+            logger.warning("Redis indisponível ao gravar %s: %s", chave, e)
+
+    @contextmanager
+    def trava(self, chave):
+        """Só uma réplica atualiza a chave por vez; retorna False se a espera esgotou"""
+        nome_trava = f"{self.prefixo}trava:{chave}"
+        token = uuid.uuid4().hex
+        limite = time.monotonic() + self.espera_trava
+
+        obtida = False
+        try:
+            while True:
+                # SET NX com validade: a trava some sozinha se a réplica cair
+                if self.cliente.set(nome_trava, token, nx=True,
+                                    px=int(self.validade_trava * 1000)):
+                    obtida = True
+                    break
+                if time.monotonic() >= limite:
+                    break
+                time.sleep(INTERVALO_TRAVA)
+        except self.erros_backend as e:
+            logger.warning("Redis indisponível: %s segue sem trava (%s)", chave, e)
+
+        try:
+            yield obtida
+        finally:
+            if obtida:
+                # Só libera a própria trava (ela pode ter expirado e sido obtida por outra réplica)
+                try:
+                    self._liberar_trava(keys=[nome_trava], args=[token])
+                except self.erros_backend as e:
+                    logger.warning("Redis indisponível ao liberar a trava de %s: %s", chave, e)
+
+    def limpar(self):
+        """Descarta todas as entradas (as travas expiram sozinhas)"""
+        try:
+            for chave in self.cliente.scan_iter(match=f"{self.prefixo}*"):
+                nome = chave.decode() if isinstance(chave, bytes) else chave
+                if not nome.startswith(f"{self.prefixo}trava:"):
+                    self.cliente.delete(chave)
+        except self.erros_backend as e:
+            logger.warning("Redis indisponível ao limpar o cache: %s", e)
+
+
+def criar_cache(config=None):
+    """Cria o backend a partir da configuração ("memoria", "dir:/caminho" ou URL redis://)"""
+    config = (config or "memoria").strip()
+
+    if config == "memoria":
+        return CacheMemoria()
+    if config.startswith(("redis://", "rediss://", "unix://")):
+        return CacheRedis(config)
+    if config.startswith("dir:"):
+        return CacheDiretorio(config[len("dir:"):])
+
+    raise ValueError(f"Backend de cache inválido: {config}")
+
+
+def chave_fonte(fonte, aba_selecionada):
+    """Chave de uma fonte (vendedor, aba) no cache"""
+    return f"fonte|{fonte['vendedor']}|{aba_selecionada}"
+
+
+def obter_fonte(cache, fonte, aba_selecionada, aceitar_expirado=False):
+    """Retorna os dados em cache da fonte, se ainda válidos (ou a última versão, se aceitar_expirado)
+
+    Cada entrada guarda o fingerprint da configuração da fonte: se a fonte muda
+    no registro, só a entrada dela deixa de valer.
+    """
+    entrada = cache.obter(chave_fonte(fonte, aba_selecionada))
+
+    if entrada is None:
+        return None
+
+    fingerprint, instante, df = entrada
+    if aceitar_expirado:
+        return df
+    if fingerprint != fonte['fingerprint'] or time.time() - instante > fonte['ttl']:
+        return None
+    return df
+
+
+def salvar_fonte(cache, fonte, aba_selecionada, df):
+    """Guarda os dados carregados da fonte junto com o fingerprint da configuração"""
+    cache.salvar(chave_fonte(fonte, aba_selecionada),
+                 (fonte['fingerprint'], time.time(), df))
+
+
+_cache_padrao = None
+_lock_cache = threading.Lock()
+
+
+def obter_cache_padrao():
+    """Cache das fontes compartilhado pelo processo, escolhido por DASH_SHEETS_CACHE"""
+    global _cache_padrao
+    with _lock_cache:
+        if _cache_padrao is None:
+            _cache_padrao = criar_cache(os.environ.get(VARIAVEL_CACHE))
+        return _cache_padrao
@@ -0,0 +1,167 @@
+import json
+import logging
+import os
+import threading
+import zlib
+
+from utils import gerar_fingerprint
+
+
+# Variável de ambiente com o caminho do arquivo ou o próprio JSON do registro
+VARIAVEL_CONFIG = "DASH_SHEETS_VENDEDORES"
+
+# Variável de ambiente para dividir os vendedores entre workers, no formato "indice/total"
+VARIAVEL_SHARD = "DASH_SHEETS_SHARD"
+
+ARQUIVO_PADRAO = os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "vendedores.json")
+
+# Endereço do Google Sheets (pode apontar para um stub local em testes de carga)
+URL_BASE_PADRAO = "https://docs.google.com"
+
+# Configurações usadas quando o registro não define um valor
+CONFIG_PADRAO_FONTE = {
+    "prioridade": 100,
+    "ttl": 300,
+    "formato_url": "export",
+    "timeout": 20,
+    "ativo": True,
+    "url_base": URL_BASE_PADRAO
+}
+
+FORMATOS_URL_VALIDOS = ("export", "gviz")
+
+# Erros de um registro inválido (JSON malformado, arquivo pela metade, campo errado)
+ERROS_REGISTRO = (OSError, ValueError, TypeError, KeyError, AttributeError)
+
+logger = logging.getLogger(__name__)
+
+
+class RegistroVendedores:
+    def __init__(self, origem=None, shard=None):
+        self.origem = origem or os.environ.get(VARIAVEL_CONFIG) or ARQUIVO_PADRAO
+        self.shard = self._interpretar_shard(
+            shard if shard is not None else os.environ.get(VARIAVEL_SHARD))
+
+        self.fontes = {}
+        self.abas = []
+        self.sinonimos_status = {}
+        self.versao = None
+
+        self._mtime = None
+        self._mtime_invalido = None
+        self._lock = threading.Lock()
+        self.recarregar()
+
+    def _origem_inline(self):
+        """Indica se a origem é o próprio JSON (vindo do ambiente) em vez de um arquivo"""
+        return self.origem.lstrip().startswith('{')
+
+    def _interpretar_shard(self, shard):
+        """Converte "indice/total" em tupla, ou None quando não há divisão"""
+        if not shard:
+            return None
+
+        indice, total = (int(parte) for parte in str(shard).split('/'))
+        if total < 1 or not 0 <= indice < total:
+            raise ValueError(f"Shard inválido: {shard}")
+        return indice, total
+
+    def _pertence_ao_shard(self, vendedor):
+        """Distribui os vendedores entre workers com um hash estável do nome"""
+        if self.shard is None:
+            return True
+
+        indice, total = self.shard
+        return zlib.crc32(vendedor.encode('utf-8')) % total == indice
+
+    def _ler_config(self):
+        """Lê o JSON do registro a partir do arquivo ou do ambiente"""
+        if self._origem_inline():
+            return json.loads(self.origem)
+
+        with open(self.origem, encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+
+    def recarregar(self):
+        """Relê o registro e recalcula as fontes ativas
+
+        O registro só é trocado se o arquivo novo for válido por inteiro.
+        """
+        with self._lock:
+            mtime = None if self._origem_inline() else os.stat(self.origem).st_mtime
+            fontes, abas, sinonimos_status = self._interpretar_config(self._ler_config())
+
+            self.fontes = fontes
+            self.abas = abas
+            self.sinonimos_status = sinonimos_status
+            self.versao = gerar_fingerprint(
+                [fonte['fingerprint'] for fonte in self.fontes.values()], self.abas,
+                sorted(self.sinonimos_status.items()))
+            self._mtime = mtime
+            self._mtime_invalido = None
+
+    def _interpretar_config(self, config):
+        """Valida o JSON do registro e retorna (fontes, abas, sinonimos_status)"""
+        padrao = {**CONFIG_PADRAO_FONTE, **config.get('padrao', {})}
+
+        fontes = {}
+        for vendedor, config_fonte in config.get('vendedores', {}).items():
+            # Aceita o formato simples "vendedor": "sheet_id"
+            if isinstance(config_fonte, str):
+                config_fonte = {'sheet_id': config_fonte}
+
+            fonte = {**padrao, **config_fonte, 'vendedor': vendedor}
+            if not fonte.get('sheet_id'):
+                raise ValueError(f"Vendedor sem sheet_id: {vendedor}")
+            if fonte['formato_url'] not in FORMATOS_URL_VALIDOS:
+                raise ValueError(
+                    f"Formato de URL inválido para {vendedor}: {fonte['formato_url']}")
+
+            if fonte['ativo'] and self._pertence_ao_shard(vendedor):
+                fonte['fingerprint'] = gerar_fingerprint(
+                    json.dumps(fonte, sort_keys=True))
+                fontes[vendedor] = fonte
+
+        # Menor prioridade carrega primeiro; empate mantém a ordem do arquivo
+        fontes = dict(
+            sorted(fontes.items(), key=lambda item: item[1]['prioridade']))
+        abas = list(config.get('abas', []))
+
+        # Variações de status escritas nas planilhas -> status conhecido
+        sinonimos_status = dict(config.get('sinonimos_status', {}))
+
+        return fontes, abas, sinonimos_status
+
+    def recarregar_se_alterado(self):
+        """Recarrega o registro se o arquivo mudou desde a última leitura"""
+        if self._origem_inline():
+            return False
+
+        try:
+            mtime = os.stat(self.origem).st_mtime
+        except OSError:
+            # Mantém a última configuração válida se o arquivo sumir
+            return False
+
+        if mtime == self._mtime or mtime == self._mtime_invalido:
+            return False
+
+        try:
+            self.recarregar()
+        except ERROS_REGISTRO as e:
+            # Arquivo pela metade ou inválido: mantém o último registro válido
+            # e só tenta de novo quando o arquivo mudar outra vez
+            self._mtime_invalido = mtime
+            logger.warning("Registro de vendedores inválido em %s, mantendo o anterior: %s",
+                           self.origem, e)
+            return False
+        return True
+
+    def obter_fontes(self):
+        """Retorna as fontes ativas deste worker, em ordem de prioridade"""
+        return self.fontes
+
+    def obter_abas(self):
+        """Retorna a lista de abas configuradas"""
+        return self.abas
@@ -0,0 +1,104 @@
+import threading
+
+import pandas as pd
+from data_processor import calcular_buckets_tempo, converter_buckets_em_datas
+from utils import gerar_fingerprint
+
+
+CATEGORIAS_STATUS = ['Em Progresso', 'Fechado', 'Perdido']
+
+
+class AnaliseCoortes:
+    """Matrizes aba × coorte (semana de criação) × vendedor × status, atualizadas por fonte
+
+    Cada (vendedor, aba) contribui com uma matriz pequena de contagens. Quando
+    uma fonte é recarregada, só a contribuição dela é trocada no total.
+    """
+
+    def __init__(self):
+        # (vendedor, aba) -> (fingerprint, contagens da fonte)
+        self._contribuicoes = {}
+        self._total = None
+        # aba -> matriz de conversão completa da aba
+        self._matrizes_conversao = {}
+        self._lock = threading.Lock()
+
+    def _contar(self, df):
+        """Conta leads por (aba, coorte, vendedor, status)"""
+        return df.groupby(
+            ['Aba', 'Bucket_Semana', 'Vendedor', 'Status_Categoria']).size()
+
+    def atualizar(self, df):
+        """Incorpora os dados processados, recalculando só as fontes que mudaram
+
+        Espera o DataFrame do DataProcessor (com Bucket_Semana e Status_Categoria).
+        Retorna quantas fontes foram atualizadas.
+        """
+        if df.empty:
+            return 0
+
+        atualizadas = 0
+        for (vendedor, aba), df_fonte in df.groupby(['Vendedor', 'Aba'], sort=False):
+            fingerprint = gerar_fingerprint(
+                df_fonte[['Bucket_Semana', 'Status_Categoria']])
+
+            with self._lock:
+                anterior = self._contribuicoes.get((vendedor, aba))
+            if anterior is not None and anterior[0] == fingerprint:
+                continue
+
+            contagens = self._contar(df_fonte)
+
+            with self._lock:
+                total = self._total
+                if total is None:
+                    total = contagens
+                else:
+                    if anterior is not None:
+                        total = total.sub(anterior[1], fill_value=0)
+                    total = total.add(contagens, fill_value=0)
+
+                self._total = total[total > 0].astype('int64')
+                self._contribuicoes[(vendedor, aba)] = (fingerprint, contagens)
+                self._matrizes_conversao.pop(aba, None)
+            atualizadas += 1
+
+        return atualizadas
+
+    def obter_matriz_conversao(self, aba, vendedores=None, data_inicio=None, data_fim=None):
+        """Taxa de conversão (%) da aba por semana de criação (linhas) e vendedor (colunas)"""
+        with self._lock:
+            matriz = self._matrizes_conversao.get(aba)
+            total = self._total
+
+        if matriz is None:
+            if total is None or aba not in total.index.get_level_values('Aba'):
+                return pd.DataFrame()
+
+            # coorte × vendedor × status da aba -> colunas por status
+            por_status = total.xs(aba, level='Aba').unstack(
+                'Status_Categoria', fill_value=0).reindex(
+                columns=CATEGORIAS_STATUS, fill_value=0)
+            leads = por_status.sum(axis=1)
+            taxa = (por_status['Fechado'] / leads * 100).unstack('Vendedor')
+
+            taxa.index = converter_buckets_em_datas(taxa.index.to_numpy(), 'semana')
+            taxa.index.name = 'Coorte'
+            matriz = taxa.sort_index()
+
+            with self._lock:
+                if self._total is total:
+                    self._matrizes_conversao[aba] = matriz
+
+        if data_inicio and data_fim:
+            # Semanas que se sobrepõem ao período selecionado
+            semanas = calcular_buckets_tempo(pd.Series(pd.to_datetime(
+                [data_inicio, data_fim])))['Bucket_Semana']
+            inicio, fim = converter_buckets_em_datas(semanas, 'semana')
+            matriz = matriz[(matriz.index >= inicio) & (matriz.index <= fim)]
+
+        if vendedores:
+            matriz = matriz[[v for v in matriz.columns if v in vendedores]]
+            matriz = matriz.dropna(how='all')
+
+        return matriz
@@ -1,48 +1,107 @@
 import pandas as pd
 import streamlit as st
-import requests
-from io import StringIO
 import time
-from utils import processar_data_inteligente, limpar_dados_linha
+from config_vendedores import RegistroVendedores, CONFIG_PADRAO_FONTE
+from leitura_planilhas import (PRAZO_CARGA, TAMANHO_MAXIMO_RESPOSTA, LeitorCorpoCsv,
+                               arrow_habilitado, classificar_cabecalhos, ler_csv,
+                               limpar_planilha, montar_urls)
+from agendador import obter_agendador_padrao, CircuitoAbertoError, PrazoEsgotadoError
+from cache_compartilhado import chave_fonte, obter_cache_padrao, obter_fonte, salvar_fonte
+
+
+def classificar_resposta(response):
+    """Classifica uma resposta do requests pelos cabeçalhos"""
+    return classificar_cabecalhos(response.status_code, response.headers)
+
+
+def ler_corpo_csv(response, tamanho_maximo=TAMANHO_MAXIMO_RESPOSTA, decodificar=True):
+    """Lê o corpo de uma resposta do requests em partes
+
+    Retorna (conteudo, motivo_rejeicao): apenas um dos dois é preenchido.
+    """
+    leitor = LeitorCorpoCsv(tamanho_maximo)
+
+    for parte in response.iter_content(chunk_size=64 * 1024):
+        motivo = leitor.adicionar(parte)
+        if motivo:
+            return None, motivo
+
+    return leitor.finalizar(decodificar)
+
+
+def limpar_cache_fontes():
+    """Descarta os dados em cache de todas as fontes (em todas as réplicas, se compartilhado)"""
+    obter_cache_padrao().limpar()
 
 
 class GoogleSheetsLoader:
-    def __init__(self):
+    def __init__(self, registro=None, armazem=None, agendador=None, prazo_carga=PRAZO_CARGA,
+                 historico=None, usar_arrow=None, cache=None, interface=True):
+        # Vendedores e abas vêm do registro configurável (vendedores.json)
+        self.registro = registro or RegistroVendedores()
+        self.fontes = self.registro.obter_fontes()
         self.vendedores_urls = {
-            "Tayssa": "1DPdvJ-hWG-O9-F_iknNU7OP-Q9evSpsOfHS7FmqqZaM",
-            "Maria Eduarda": "1xdAvHXE1aCbkQbAViHLSxI_BzKbS5J7byJ8bbBmMjnU",
-            "Marya": "128BEya1w06bRtGC9J90vV0X7B7Yyp-pRaWgBr_3bxnk",
-            "Danúbia": "1cIqwN5BL_synxO2gYH2QCqEG-0-GJUjTKLnSAs4-1M0",
-            "Debóra": "1D50iY5pu7unzBO9we0xtk2_Ro9vIGH6T-kd8Z7v1DVA",
-            "Felipe": "1hZLQ5-pQsKhRv4hSQZLS9k8KRSoYjzKAUmSnjKf9umg"
+            vendedor: fonte['sheet_id'] for vendedor, fonte in self.fontes.items()
         }
 
         # Abas disponíveis
-        self.abas_disponiveis = [
-            "Setembro", "Outubro", "Novembro", "Dezembro",
-            "Janeiro", "Fevereiro", "Março", "Abril", "Maio",
-            "Junho", "Julho", "Agosto"
-        ]
+        self.abas_disponiveis = self.registro.obter_abas()
+
+        # Armazém local opcional onde os leads processados são gravados
+        self.armazem = armazem
+
+        # Histórico opcional de mudanças de status entre cargas sucessivas
+        self.historico = historico
+
+        # Limite de taxa, novas tentativas e disjuntor compartilhados pelo processo
+        self.agendador = agendador or obter_agendador_padrao()
+        self.prazo_carga = prazo_carga
+
+        # Modo Arrow (opcional): colunas pd.ArrowDtype em vez de objetos Python
+        self.usar_arrow = arrow_habilitado() if usar_arrow is None else usar_arrow
+
+        # Cache por (vendedor, aba): do processo ou compartilhado entre réplicas
+        # (DASH_SHEETS_CACHE), invalidado pelo fingerprint e pelo TTL da fonte
+        self.cache = cache or obter_cache_padrao()
+
+        # Com interface=False nada é desenhado na página: os avisos ficam em
+        # self.avisos (ex.: carga dentro de st.cache_resource, que repetiria os elementos)
+        self.interface = interface
+        self.avisos = []
+
+    def _depurar(self):
+        """Indica se as mensagens de depuração devem ser desenhadas"""
+        return self.interface and st.session_state.get('debug_mode', False)
+
+    def _avisar(self, nivel, mensagem):
+        """Mostra a mensagem (st.info, st.warning...) ou a guarda em self.avisos"""
+        if self.interface:
+            getattr(st, nivel)(mensagem)
+        else:
+            self.avisos.append((nivel, mensagem))
 
-    def carregar_dados_vendedor(self, vendedor, sheet_id, aba_selecionada="Setembro"):
+    def _chave_cache_fonte(self, fonte, aba_selecionada):
+        """Chave da fonte no cache"""
+        return chave_fonte(fonte, aba_selecionada)
+
+    def _obter_cache_fonte(self, fonte, aba_selecionada, aceitar_expirado=False):
+        """Retorna os dados em cache da fonte, se ainda válidos (ou a última versão, se aceitar_expirado)"""
+        return obter_fonte(self.cache, fonte, aba_selecionada, aceitar_expirado)
+
+    def _salvar_cache_fonte(self, fonte, aba_selecionada, df):
+        """Guarda os dados carregados da fonte junto com o fingerprint da configuração"""
+        salvar_fonte(self.cache, fonte, aba_selecionada, df)
+
+    def carregar_dados_vendedor(self, vendedor, sheet_id, aba_selecionada="Setembro", fonte=None, prazo=None):
         """Carrega dados de um vendedor específico do Google Sheets de uma aba específica"""
+        # Importado apenas quando há download de fato (a inicialização não precisa dele)
+        import requests
+
+        fonte = fonte or {**CONFIG_PADRAO_FONTE, 'vendedor': vendedor, 'sheet_id': sheet_id}
         try:
             # Lista expandida de URLs para tentar acessar a planilha
-            urls_tentativas = [
-                # Formato 1: Export CSV com nome da aba
-                f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&sheet={aba_selecionada}",
-                # Formato 2: gviz com nome da aba
-                f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&sheet={aba_selecionada}",
-                # Formato 3: Export CSV com GID 0 (primeira aba)
-                f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid=0",
-                # Formato 4: gviz com GID 0
-                f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&gid=0",
-                # Formato 5: Export CSV sem especificar aba (pega a primeira)
-                f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv",
-                # Formato 6: Tentativa com diferentes GIDs
-                f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid=1",
-                f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid=2",
-            ]
+            urls_tentativas = montar_urls(
+                sheet_id, aba_selecionada, fonte['formato_url'], fonte['url_base'])
 
             df = pd.DataFrame()
             url_sucesso = None
@@ -51,38 +110,46 @@ class GoogleSheetsLoader:
             for i, url in enumerate(urls_tentativas):
                 try:
                     # Debug: mostra qual URL está sendo testada
-                    if st.session_state.get('debug_mode', False):
+                    if self._depurar():
                         st.write(
                             f"🔍 Testando URL {i+1} para {vendedor}: {url}")
 
-                    # Tenta carregar com requests
-                    response = requests.get(url, timeout=20)
-
-                    if response.status_code == 200:
-                        # Tenta decodificar o conteúdo
-                        try:
-                            content = response.content.decode('utf-8')
-                        except UnicodeDecodeError:
-                            content = response.content.decode('latin-1')
-
-                        # Verifica se não é uma página de erro e tem conteúdo substancial
-                        if ('error' not in content.lower() and
-                            'not found' not in content.lower() and
-                                len(content) > 50):
-
-                            df = pd.read_csv(StringIO(content))
-
-                            # Verifica se tem dados válidos (pelo menos 1 coluna)
-                            if not df.empty and len(df.columns) >= 1:
-                                url_sucesso = url
-                                if st.session_state.get('debug_mode', False):
-                                    st.success(
-                                        f"✅ URL {i+1} funcionou! Shape: {df.shape}")
-                                break
-
+                    # Tenta carregar respeitando o ritmo por host e o prazo da carga
+                    response = self.agendador.obter(
+                        url, timeout=fonte['timeout'], prazo=prazo, stream=True)
+
+                    try:
+                        # Rejeita pelos cabeçalhos antes de baixar o corpo
+                        motivo = classificar_resposta(response)
+                        if motivo is None:
+                            content, motivo = ler_corpo_csv(
+                                response, decodificar=not self.usar_arrow)
+                    finally:
+                        response.close()
+
+                    if motivo is None:
+                        df = ler_csv(content, self.usar_arrow)
+
+                        # Verifica se tem dados válidos (pelo menos 1 coluna)
+                        if not df.empty and len(df.columns) >= 1:
+                            url_sucesso = url
+                            if self._depurar():
+                                st.success(
+                                    f"✅ URL {i+1} funcionou! Shape: {df.shape}")
+                            break
+                        motivo = "CSV sem dados"
+
+                    erro_detalhes.append(f"URL {i+1}: {motivo}")
+
+                except CircuitoAbertoError:
+                    # Host bloqueado após falhas seguidas: não insiste nas outras URLs
                     erro_detalhes.append(
-                        f"URL {i+1}: Status {response.status_code}")
-
+                        f"URL {i+1}: Circuito aberto, Google indisponível no momento")
+                    break
+                except PrazoEsgotadoError:
+                    erro_detalhes.append(
+                        f"URL {i+1}: Prazo da carga esgotado")
+                    break
                 except requests.exceptions.RequestException as e:
                     erro_detalhes.append(
                         f"URL {i+1}: Erro de conexão - {str(e)}")
@@ -92,14 +159,14 @@ class GoogleSheetsLoader:
                     continue
 
             if df.empty:
-                st.warning(
-                    f"⚠️ Não foi possível carregar dados de {vendedor} (aba: {aba_selecionada})")
-                if st.session_state.get('debug_mode', False):
+                self._avisar(
+                    "warning", f"⚠️ Não foi possível carregar dados de {vendedor} (aba: {aba_selecionada})")
+                if self._depurar():
                     st.write("Detalhes dos erros:", erro_detalhes)
                 return pd.DataFrame()
 
             # Debug: mostra informações sobre os dados carregados
-            if st.session_state.get('debug_mode', False):
+            if self._depurar():
                 st.success(
                     f"✅ Dados carregados de {vendedor} via: {url_sucesso}")
                 st.write(f"Shape original: {df.shape}")
@@ -112,68 +179,33 @@ class GoogleSheetsLoader:
             return df_processado
 
         except Exception as e:
-            st.error(f"❌ Erro crítico ao carregar {vendedor}: {str(e)}")
+            self._avisar("error", f"❌ Erro crítico ao carregar {vendedor}: {str(e)}")
             return pd.DataFrame()
 
     def processar_dataframe_inteligente(self, df, vendedor, aba_selecionada):
         """Processa e limpa o DataFrame carregado de forma inteligente"""
         try:
             # Debug: mostra o DataFrame original
-            if st.session_state.get('debug_mode', False):
+            if self._depurar():
                 st.write(f"📊 DataFrame original de {vendedor}:")
                 st.write(f"Shape: {df.shape}")
                 st.write("Primeiras 3 linhas:")
                 st.dataframe(df.head(3))
 
-            # Remove colunas completamente vazias
-            df = df.dropna(axis=1, how='all')
-
-            if df.empty or len(df.columns) < 3:
-                if st.session_state.get('debug_mode', False):
-                    st.warning(
-                        f"⚠️ {vendedor}: DataFrame vazio ou com poucas colunas após limpeza")
-                return pd.DataFrame()
-
-            # Detecta e remove linhas de cabeçalho
-            df = self.detectar_e_remover_cabecalhos(df)
-
-            # Garante que temos pelo menos 3 colunas (Data, Aluno, Telefone)
-            if len(df.columns) < 3:
-                if st.session_state.get('debug_mode', False):
-                    st.warning(
-                        f"⚠️ {vendedor}: Menos de 3 colunas disponíveis")
-                return pd.DataFrame()
-
-            # Mapeia as colunas de forma inteligente
-            df_limpo = self.mapear_colunas_inteligente(df)
-
-            # Processa as datas de forma inteligente
-            df_limpo['Data_Original'] = df_limpo['Data'].copy()
-            df_limpo['Data'] = df_limpo['Data'].apply(
-                processar_data_inteligente)
-
-            # Remove apenas linhas onde TANTO data quanto aluno/telefone estão vazios
-            # (permite leads só com telefone ou só com nome)
-            condicoes_validas = (
-                (df_limpo['Data'].notna()) &  # Data deve ser válida
-                (
-                    # Nome OU
-                    (df_limpo['Aluno'].astype(str).str.strip() != '') |
-                    (df_limpo['Telefone'].astype(
-                        str).str.strip() != '')  # Telefone
-                )
-            )
-
-            df_limpo = df_limpo[condicoes_validas]
-
-            # Adiciona informações do vendedor e aba
-            df_limpo['Vendedor'] = vendedor
-            df_limpo['Aba'] = aba_selecionada
+            df_limpo, aviso = limpar_planilha(
+                df, vendedor, aba_selecionada, self.usar_arrow)
 
             # Debug: mostra o resultado final
-            if st.session_state.get('debug_mode', False):
+            if self._depurar():
+                if aviso:
+                    st.warning(f"⚠️ {vendedor}: {aviso}")
+                    return df_limpo
+
                 st.write(f"📈 DataFrame processado de {vendedor}:")
                 st.write(f"Registros válidos: {len(df_limpo)}")
+                if df_limpo['Data_Suspeita'].any():
+                    st.warning(
+                        f"⚠️ {vendedor}: {int(df_limpo['Data_Suspeita'].sum())} datas fora do período da aba")
                 if len(df_limpo) > 0:
                     st.write("Amostra dos dados processados:")
                     st.dataframe(df_limpo.head(3))
@@ -181,107 +213,70 @@ class GoogleSheetsLoader:
             return df_limpo
 
         except Exception as e:
-            st.error(f"❌ Erro ao processar dados de {vendedor}: {str(e)}")
-            if st.session_state.get('debug_mode', False):
+            self._avisar("error", f"❌ Erro ao processar dados de {vendedor}: {str(e)}")
+            if self._depurar():
                 st.write(f"Erro detalhado: {type(e).__name__}: {str(e)}")
             return pd.DataFrame()
 
-    def detectar_e_remover_cabecalhos(self, df):
-        """Detecta e remove linhas de cabeçalho automaticamente"""
-        if df.empty:
-            return df
-
-        # Palavras-chave que indicam cabeçalhos
-        palavras_cabecalho = [
-            'data', 'nome', 'aluno', 'telefone', 'status', 'lead',
-            'cliente', 'contato', 'whatsapp', 'celular', 'situacao'
-        ]
-
-        linhas_para_remover = []
-
-        # Verifica as primeiras 5 linhas
-        for i in range(min(5, len(df))):
-            linha_str = ' '.join(df.iloc[i].astype(str)).lower()
-
-            # Se encontrar 2 ou mais palavras-chave, considera cabeçalho
-            palavras_encontradas = sum(
-                1 for palavra in palavras_cabecalho if palavra in linha_str)
-            if palavras_encontradas >= 2:
-                linhas_para_remover.append(i)
-
-        # Remove as linhas identificadas como cabeçalho
-        if linhas_para_remover:
-            df = df.drop(df.index[linhas_para_remover]).reset_index(drop=True)
-
-        return df
-
-    def mapear_colunas_inteligente(self, df):
-        """Mapeia as colunas de forma inteligente baseado no conteúdo"""
-        df_limpo = pd.DataFrame()
-
-        # Mapeia as colunas baseado na posição (padrão)
-        # Coluna A (índice 0) = Data
-        df_limpo['Data'] = df.iloc[:, 0] if len(df.columns) > 0 else ""
-
-        # Coluna B (índice 1) = Aluno
-        df_limpo['Aluno'] = df.iloc[:, 1] if len(df.columns) > 1 else ""
-
-        # Coluna C (índice 2) = Telefone
-        df_limpo['Telefone'] = df.iloc[:, 2] if len(df.columns) > 2 else ""
-
-        # Coluna E (índice 4) = Status, com fallbacks
-        if len(df.columns) >= 5:
-            df_limpo['Status'] = df.iloc[:, 4]  # Coluna E
-        elif len(df.columns) >= 4:
-            df_limpo['Status'] = df.iloc[:, 3]  # Coluna D
-        else:
-            df_limpo['Status'] = 'EM PROGRESSO'  # Padrão
-
-        return df_limpo
-
     def carregar_todos_dados(self, aba_selecionada="Setembro"):
         """Carrega dados de todos os vendedores de uma aba específica"""
         dados_completos = []
 
-        # Cria barra de progresso
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+        # Barra de progresso só quando a carga roda direto na página
+        if self.interface:
+            progress_bar = st.progress(0)
+            status_text = st.empty()
 
-        total_vendedores = len(self.vendedores_urls)
+        total_vendedores = len(self.fontes)
         vendedores_carregados = 0
         total_registros = 0
 
-        for i, (vendedor, sheet_id) in enumerate(self.vendedores_urls.items()):
-            status_text.text(
-                f'🔄 Carregando dados de {vendedor} (aba: {aba_selecionada})...')
+        # Prazo total da carga, compartilhado por todos os vendedores
+        prazo = time.monotonic() + self.prazo_carga
+
+        for i, (vendedor, fonte) in enumerate(self.fontes.items()):
+            # Fontes inalteradas e dentro do TTL não são baixadas de novo
+            df_vendedor = self._obter_cache_fonte(fonte, aba_selecionada)
 
-            df_vendedor = self.carregar_dados_vendedor(
-                vendedor, sheet_id, aba_selecionada)
+            if df_vendedor is None:
+                if self.interface:
+                    status_text.text(
+                        f'🔄 Carregando dados de {vendedor} (aba: {aba_selecionada})...')
+
+                # Só uma réplica/sessão baixa a fonte por vez; as demais esperam
+                # e aproveitam o resultado gravado no cache
+                with self.cache.trava(self._chave_cache_fonte(fonte, aba_selecionada)):
+                    df_vendedor = self._obter_cache_fonte(fonte, aba_selecionada)
+                    if df_vendedor is None:
+                        df_vendedor = self.atualizar_fonte(
+                            vendedor, fonte, aba_selecionada, prazo)
 
             if not df_vendedor.empty:
                 dados_completos.append(df_vendedor)
                 vendedores_carregados += 1
                 total_registros += len(df_vendedor)
-                status_text.text(
-                    f'✅ {vendedor}: {len(df_vendedor)} registros carregados')
-            else:
+                if self.interface:
+                    status_text.text(
+                        f'✅ {vendedor}: {len(df_vendedor)} registros carregados')
+            elif self.interface:
                 status_text.text(f'❌ {vendedor}: Nenhum dado carregado')
 
-            progress_bar.progress((i + 1) / total_vendedores)
-            time.sleep(0.3)  # Pausa menor para ser mais rápido
+            if self.interface:
+                progress_bar.progress((i + 1) / total_vendedores)
 
         # Limpa os elementos de progresso
-        progress_bar.empty()
-        status_text.empty()
+        if self.interface:
+            progress_bar.empty()
+            status_text.empty()
 
         if dados_completos:
             df_final = pd.concat(dados_completos, ignore_index=True)
-            st.success(
-                f"✅ Dados carregados de {vendedores_carregados}/{total_vendedores} vendedores!")
-            st.info(f"📊 Total de registros carregados: {len(df_final)}")
+            self._avisar(
+                "success", f"✅ Dados carregados de {vendedores_carregados}/{total_vendedores} vendedores!")
+            self._avisar("info", f"📊 Total de registros carregados: {len(df_final)}")
 
             # Mostra estatísticas por vendedor
-            if st.session_state.get('debug_mode', False):
+            if self._depurar():
                 st.write("📈 Registros por vendedor:")
                 stats_vendedor = df_final.groupby(
                     'Vendedor').size().sort_values(ascending=False)
@@ -289,73 +284,76 @@ class GoogleSheetsLoader:
 
             return df_final
         else:
-            st.error(
-                f"❌ Não foi possível carregar dados de nenhuma planilha da aba '{aba_selecionada}'.")
-            st.info("💡 Verifique se as planilhas estão públicas e se a aba existe.")
+            self._avisar(
+                "error", f"❌ Não foi possível carregar dados de nenhuma planilha da aba '{aba_selecionada}'.")
+            self._avisar("info", "💡 Verifique se as planilhas estão públicas e se a aba existe.")
             return pd.DataFrame()
 
+    def atualizar_fonte(self, vendedor, fonte, aba_selecionada, prazo=None):
+        """Baixa a fonte e atualiza cache, armazém e histórico; em falha, usa a última versão"""
+        df_vendedor = self.carregar_dados_vendedor(
+            vendedor, fonte['sheet_id'], aba_selecionada, fonte, prazo)
+        if not df_vendedor.empty:
+            self._salvar_cache_fonte(fonte, aba_selecionada, df_vendedor)
+            self.salvar_no_armazem(vendedor, df_vendedor)
+            self.registrar_no_historico(
+                vendedor, aba_selecionada, df_vendedor)
+            return df_vendedor
+
+        # Falhou (ex.: Google limitando): serve a última versão em cache
+        df_cache = self._obter_cache_fonte(
+            fonte, aba_selecionada, aceitar_expirado=True)
+        if df_cache is not None:
+            self._avisar(
+                "info", f"💾 {vendedor}: usando a última versão em cache")
+            return df_cache
+        return df_vendedor
+
+    def salvar_no_armazem(self, vendedor, df_vendedor):
+        """Grava os dados recém-carregados no armazém local, se configurado"""
+        if self.armazem is None:
+            return
+
+        try:
+            self.armazem.salvar_leads(df_vendedor)
+        except Exception as e:
+            self._avisar(
+                "warning", f"⚠️ Não foi possível gravar {vendedor} no armazém local: {str(e)}")
+
+    def registrar_no_historico(self, vendedor, aba_selecionada, df_vendedor):
+        """Compara a carga com a anterior e registra as mudanças de status"""
+        if self.historico is None:
+            return
+
+        try:
+            eventos = self.historico.registrar_carga(
+                df_vendedor, vendedor, aba_selecionada)
+            if not eventos.empty and self._depurar():
+                st.write(
+                    f"🔁 {vendedor}: {len(eventos)} mudanças de status detectadas")
+        except Exception as e:
+            self._avisar(
+                "warning", f"⚠️ Não foi possível registrar o histórico de {vendedor}: {str(e)}")
+
     def obter_abas_disponiveis(self):
         """Retorna lista de abas disponíveis"""
         return self.abas_disponiveis
 
 
-def carregar_dados_demo():
+def carregar_dados_demo(vendedores=None, aba_selecionada="Setembro", n_linhas=800):
     """Carrega dados de demonstração para teste"""
-    import random
-    from datetime import datetime, timedelta
-
-    vendedores = ["Tayssa", "Maria Eduarda",
-                  "Marya", "Danúbia", "Debóra", "Felipe"]
-
-    # Status atualizados conforme especificação
-    status_list = [
-        "LEAD PERDIDO",
-        "EM PROGRESSO",
-        "PAGO",
-        "NÃO RESPONDE",
-        "AGUARDANDO RETORNO",
-        "NEGOCIANDO",
-        "INTERESSADO"
-    ]
-
-    dados = []
-
-    # Gera dados de demonstração mais realistas
-    for _ in range(800):  # Mais dados para simular planilhas reais
-        data = datetime.now() - timedelta(days=random.randint(0, 120))
-
-        # Simula diferentes formatos de data
-        formato_data = random.choice([
-            data.strftime('%d/%m/%Y'),
-            data.strftime('%d/%m/%y'),
-            data.strftime('%d/%m'),
-        ])
-
-        # Alguns leads só com telefone, outros só com nome
-        if random.random() > 0.3:  # 70% têm nome
-            nome_aluno = f"Aluno {random.randint(1000, 9999)}"
-        else:
-            nome_aluno = ""
+    from gerador_sintetico import gerar_dados_sinteticos
 
-        if random.random() > 0.2:  # 80% têm telefone
-            telefone = f"({random.randint(11, 99)}) 9{random.randint(1000, 9999)}-{random.randint(1000, 9999)}"
-        else:
-            telefone = ""
-
-        # Garante que pelo menos um dos dois (nome ou telefone) existe
-        if not nome_aluno and not telefone:
-            if random.random() > 0.5:
-                nome_aluno = f"Aluno {random.randint(1000, 9999)}"
-            else:
-                telefone = f"({random.randint(11, 99)}) 9{random.randint(1000, 9999)}-{random.randint(1000, 9999)}"
-
-        dados.append({
-            'Data': formato_data,
-            'Aluno': nome_aluno,
-            'Telefone': telefone,
-            'Status': random.choice(status_list),
-            'Vendedor': random.choice(vendedores),
-            'Aba': 'Setembro'
-        })
-
-    return pd.DataFrame(dados)
+    # Usa os vendedores do registro para a demonstração parecer com os dados reais
+    if vendedores is None:
+        try:
+            vendedores = list(RegistroVendedores().obter_fontes()) or None
+        except Exception:
+            vendedores = None
+
+    return gerar_dados_sinteticos(
+        n_linhas=n_linhas,
+        vendedores=vendedores,
+        abas=[aba_selecionada],
+        dias_historico=120
+    )
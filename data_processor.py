@@ -1,11 +1,43 @@
+import threading
+from collections import OrderedDict
+from itertools import count
+
+import numpy as np
 import pandas as pd
-from datetime import datetime
-from utils import categorizar_status, validar_telefone, validar_nome
+from utils import categorizar_status_serie, validar_texto_serie
+
+
+# Níveis de agregação temporal e a coluna de bucket inteiro de cada um
+COLUNAS_BUCKET_TEMPO = {
+    'dia': 'Bucket_Dia',        # dias desde 1970-01-01
+    'semana': 'Bucket_Semana',  # semanas (segunda a domingo) desde 1970
+    'mes': 'Bucket_Mes'         # meses desde jan/1970
+}
+
+# Identificador único de cada conjunto de dados processado neste processo
+_contador_versoes = count(1)
+
+# Limites do memo de resultados por filtro (LRU por tamanho e por quantidade)
+MAX_BYTES_MEMO = 128 * 1024 * 1024
+MAX_ENTRADAS_MEMO = 256
+
+# Resultados maiores que esta fração do limite não são guardados (esvaziariam o memo)
+FRACAO_MAXIMA_ENTRADA = 4
 
 
 class DataProcessor:
     def __init__(self, df):
         self.df = df.copy()
+        self.versao = next(_contador_versoes)
+        self._rollups_tempo = {}
+
+        # (operação, versão, vendedores, início, fim) -> (resultado, bytes), em ordem LRU
+        self._memo = OrderedDict()
+        self._bytes_memo = 0
+        self._acertos_memo = 0
+        self._falhas_memo = 0
+        self._lock_memo = threading.Lock()
+
         self.processar_dados()
 
     def processar_dados(self):
@@ -27,20 +59,75 @@ class DataProcessor:
         self.df = self.df.dropna(subset=['Data'])
 
         # Categoriza os status
-        self.df['Status_Categoria'] = self.df['Status'].apply(
-            categorizar_status)
+        self.df['Status_Categoria'] = categorizar_status_serie(self.df['Status'])
+
+        # Valida telefones e nomes (mesma regra de validar_telefone/validar_nome, vetorizada)
+        self.df['Tem_Telefone'] = validar_texto_serie(self.df['Telefone'])
+        self.df['Tem_Nome'] = validar_texto_serie(self.df['Aluno'])
+
+        # Buckets inteiros de tempo, calculados uma vez para os agrupamentos
+        self.df = self.df.assign(**calcular_buckets_tempo(self.df['Data']))
+
+        # Agregados por nível de tempo do conjunto completo, calculados sob demanda
+        self._rollups_tempo = {}
+        self.limpar_memo()
 
-        # Valida telefones e nomes
-        self.df['Tem_Telefone'] = self.df['Telefone'].apply(validar_telefone)
-        self.df['Tem_Nome'] = self.df['Aluno'].apply(validar_nome)
+    def limpar_memo(self):
+        """Descarta os resultados memorizados por filtro"""
+        with self._lock_memo:
+            self._memo.clear()
+            self._bytes_memo = 0
 
-        # Adiciona coluna de mês/ano para agrupamentos
-        self.df['Mes_Ano'] = self.df['Data'].dt.to_period('M')
-        self.df['Data_Formatada'] = self.df['Data'].dt.strftime('%d/%m/%Y')
+    def _memorizar(self, operacao, vendedores, data_inicio, data_fim, calcular):
+        """Retorna o resultado memorizado para o filtro ou calcula e guarda (LRU por tamanho)"""
+        chave = (operacao, self.versao, tuple(sorted(vendedores or ())), data_inicio, data_fim)
+
+        with self._lock_memo:
+            entrada = self._memo.get(chave)
+            if entrada is not None:
+                self._memo.move_to_end(chave)
+                self._acertos_memo += 1
+                return entrada[0]
+            self._falhas_memo += 1
+
+        resultado = calcular()
+        tamanho = _estimar_tamanho(resultado)
+        if tamanho > MAX_BYTES_MEMO // FRACAO_MAXIMA_ENTRADA:
+            return resultado
+
+        with self._lock_memo:
+            anterior = self._memo.pop(chave, None)
+            if anterior is not None:
+                self._bytes_memo -= anterior[1]
+            self._memo[chave] = (resultado, tamanho)
+            self._bytes_memo += tamanho
+
+            while self._memo and (self._bytes_memo > MAX_BYTES_MEMO or
+                                  len(self._memo) > MAX_ENTRADAS_MEMO):
+                _, (_, tamanho_removido) = self._memo.popitem(last=False)
+                self._bytes_memo -= tamanho_removido
+
+        return resultado
+
+    def estatisticas_memo(self):
+        """Acertos, falhas, entradas e bytes do memo (para o modo debug)"""
+        with self._lock_memo:
+            return {
+                'acertos': self._acertos_memo,
+                'falhas': self._falhas_memo,
+                'entradas': len(self._memo),
+                'bytes': self._bytes_memo
+            }
 
     def filtrar_dados(self, vendedores_selecionados, data_inicio, data_fim):
-        """Filtra os dados baseado nos critérios selecionados"""
-        df_filtrado = self.df.copy()
+        """Filtra os dados baseado nos critérios selecionados (memorizado; não modifique o retorno)"""
+        return self._memorizar(
+            'filtro', vendedores_selecionados, data_inicio, data_fim,
+            lambda: self._filtrar_dados(vendedores_selecionados, data_inicio, data_fim))
+
+    def _filtrar_dados(self, vendedores_selecionados, data_inicio, data_fim):
+        """Aplica os filtros de vendedor e de período"""
+        df_filtrado = self.df
 
         # Filtro por vendedor
         if vendedores_selecionados:
@@ -56,6 +143,32 @@ class DataProcessor:
 
         return df_filtrado
 
+    def obter_kpis(self, vendedores_selecionados, data_inicio, data_fim):
+        """KPIs do filtro, memorizados"""
+        kpis = self._memorizar(
+            'kpis', vendedores_selecionados, data_inicio, data_fim,
+            lambda: self.calcular_kpis(
+                self.filtrar_dados(vendedores_selecionados, data_inicio, data_fim)))
+        return dict(kpis)
+
+    def obter_resumo_vendedores(self, vendedores_selecionados, data_inicio, data_fim):
+        """Métricas por vendedor do filtro, memorizadas (não modifique o retorno)"""
+        return self._memorizar(
+            'vendedores', vendedores_selecionados, data_inicio, data_fim,
+            lambda: self.obter_dados_por_vendedor(
+                self.filtrar_dados(vendedores_selecionados, data_inicio, data_fim)))
+
+    def obter_serie_tempo(self, vendedores_selecionados, data_inicio, data_fim):
+        """Nível de tempo e série de leads do filtro, memorizados"""
+        def calcular():
+            df_filtrado = self.filtrar_dados(
+                vendedores_selecionados, data_inicio, data_fim)
+            nivel = self.escolher_nivel_tempo(df_filtrado)
+            return nivel, self.obter_leads_por_tempo(df_filtrado, nivel)
+
+        return self._memorizar(
+            'tempo', vendedores_selecionados, data_inicio, data_fim, calcular)
+
     def calcular_kpis(self, df_filtrado):
         """Calcula os KPIs principais"""
         if df_filtrado.empty:
@@ -124,13 +237,89 @@ class DataProcessor:
 
         return vendedor_stats
 
-    def obter_leads_por_tempo(self, df_filtrado):
+    def escolher_nivel_tempo(self, df_filtrado):
+        """Escolhe a granularidade da série (dia, semana ou mês) pelo período coberto"""
+        if df_filtrado.empty:
+            return 'dia'
+
+        dias = df_filtrado['Bucket_Dia'].max() - df_filtrado['Bucket_Dia'].min()
+        if dias <= 90:
+            return 'dia'
+        elif dias <= 730:
+            return 'semana'
+        else:
+            return 'mes'
+
+    def agregar_por_tempo(self, df, nivel='dia'):
+        """Conta leads por bucket de tempo com bincount (inclui os buckets sem leads)"""
+        if df.empty:
+            return pd.DataFrame()
+
+        buckets = df[COLUNAS_BUCKET_TEMPO[nivel]].to_numpy()
+        inicio = buckets.min()
+        contagens = np.bincount(buckets - inicio)
+
+        return pd.DataFrame({
+            'Data': converter_buckets_em_datas(
+                np.arange(inicio, inicio + len(contagens)), nivel),
+            'Quantidade': contagens
+        })
+
+    def obter_rollup_tempo(self, nivel='dia'):
+        """Retorna os leads do conjunto completo por nível de tempo (em cache)"""
+        if nivel not in self._rollups_tempo:
+            self._rollups_tempo[nivel] = self.agregar_por_tempo(self.df, nivel)
+        return self._rollups_tempo[nivel]
+
+    def obter_leads_por_tempo(self, df_filtrado, nivel='dia'):
         """Obtém dados de leads criados ao longo do tempo"""
         if df_filtrado.empty:
             return pd.DataFrame()
 
-        leads_tempo = df_filtrado.groupby(
-            'Data').size().reset_index(name='Quantidade')
-        leads_tempo = leads_tempo.sort_values('Data')
+        # Sem filtro efetivo, usa o agregado pré-calculado
+        if len(df_filtrado) == len(self.df):
+            return self.obter_rollup_tempo(nivel)
+
+        return self.agregar_por_tempo(df_filtrado, nivel)
+
+
+def calcular_buckets_tempo(datas):
+    """Calcula os buckets inteiros de dia, semana e mês de uma coluna de datas"""
+    valores = datas.to_numpy(dtype='datetime64[ns]')
+    dias = valores.astype('datetime64[D]').astype(np.int64)
+
+    return {
+        'Bucket_Dia': dias,
+        # 1970-01-01 foi quinta-feira: +3 alinha as semanas na segunda-feira
+        'Bucket_Semana': (dias + 3) // 7,
+        'Bucket_Mes': valores.astype('datetime64[M]').astype(np.int64)
+    }
+
+
+def converter_buckets_em_datas(buckets, nivel):
+    """Converte buckets inteiros de volta na data de início de cada bucket"""
+    buckets = np.asarray(buckets, dtype=np.int64)
+
+    if nivel == 'dia':
+        datas = buckets.astype('datetime64[D]')
+    elif nivel == 'semana':
+        datas = (buckets * 7 - 3).astype('datetime64[D]')
+    else:
+        datas = buckets.astype('datetime64[M]')
+
+    return pd.to_datetime(datas.astype('datetime64[ns]'))
+
+
+def _estimar_tamanho(valor):
+    """Bytes aproximados de um resultado memorizado
 
-        return leads_tempo
+    Para DataFrames conta só os buffers das colunas: textos são referências
+    compartilhadas com o DataFrame completo, não cópias.
+    """
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return int(np.sum(valor.memory_usage(index=True, deep=False)))
+    if isinstance(valor, dict):
+        return 64 * (len(valor) + 1)
+    if isinstance(valor, tuple):
+        return sum(_estimar_tamanho(item) for item in valor)
+    return 64
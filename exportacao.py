@@ -0,0 +1,143 @@
+import gzip
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+# Formatos suportados na exportação dos dados filtrados
+FORMATOS_EXPORTACAO = {
+    "CSV": {"extensao": "csv", "mime": "text/csv"},
+    "CSV (gzip)": {"extensao": "csv.gz", "mime": "application/gzip"},
+    "Parquet": {"extensao": "parquet", "mime": "application/vnd.apache.parquet"},
+}
+
+# Quantidade de linhas escritas por vez no arquivo temporário
+TAMANHO_CHUNK = 50_000
+
+# Quantidade máxima de arquivos mantidos em disco
+MAX_ARTEFATOS = 16
+
+# Tamanho máximo de um arquivo oferecido para download (o Streamlit o carrega em memória)
+TAMANHO_MAXIMO_DOWNLOAD = 50 * 1024 * 1024
+
+
+class ExportadorDados:
+    def __init__(self, diretorio=None, tamanho_chunk=TAMANHO_CHUNK, max_artefatos=MAX_ARTEFATOS):
+        self.diretorio = diretorio or tempfile.mkdtemp(prefix="dash_sheets_export_")
+        self.tamanho_chunk = tamanho_chunk
+        self.max_artefatos = max_artefatos
+
+        # fingerprint -> caminho do arquivo, em ordem de uso (LRU)
+        self._artefatos = OrderedDict()
+        self._lock = threading.Lock()
+        self._locks_fingerprint = {}
+
+    def exportar(self, df, formato, fingerprint):
+        """Retorna o caminho do arquivo exportado, gerando-o apenas se ainda não existir"""
+        if formato not in FORMATOS_EXPORTACAO:
+            raise ValueError(f"Formato de exportação inválido: {formato}")
+
+        caminho = self._obter_artefato(fingerprint)
+        if caminho:
+            return caminho
+
+        # Lock por fingerprint: outras sessões continuam exportando em paralelo
+        with self._lock:
+            lock_fingerprint = self._locks_fingerprint.setdefault(
+                fingerprint, threading.Lock())
+
+        try:
+            with lock_fingerprint:
+                # Outra sessão pode ter gerado o mesmo arquivo enquanto esperávamos
+                caminho = self._obter_artefato(fingerprint)
+                if caminho:
+                    return caminho
+
+                extensao = FORMATOS_EXPORTACAO[formato]['extensao']
+                caminho = os.path.join(self.diretorio, f"{fingerprint}.{extensao}")
+                caminho_tmp = f"{caminho}.tmp"
+
+                try:
+                    if formato == "Parquet":
+                        self._escrever_parquet(df, caminho_tmp)
+                    else:
+                        self._escrever_csv(
+                            df, caminho_tmp, compactar=(formato == "CSV (gzip)"))
+                    os.replace(caminho_tmp, caminho)
+                finally:
+                    if os.path.exists(caminho_tmp):
+                        os.remove(caminho_tmp)
+
+                self._registrar_artefato(fingerprint, caminho)
+        finally:
+            # Remove o lock mesmo se a escrita falhar
+            with self._lock:
+                self._locks_fingerprint.pop(fingerprint, None)
+
+        return caminho
+
+    def _obter_artefato(self, fingerprint):
+        """Busca um arquivo já exportado e marca como usado recentemente"""
+        with self._lock:
+            caminho = self._artefatos.get(fingerprint)
+            if caminho and os.path.exists(caminho):
+                self._artefatos.move_to_end(fingerprint)
+                return caminho
+            self._artefatos.pop(fingerprint, None)
+            return None
+
+    def _registrar_artefato(self, fingerprint, caminho):
+        """Registra o arquivo gerado e remove os mais antigos além do limite"""
+        with self._lock:
+            self._artefatos[fingerprint] = caminho
+            self._artefatos.move_to_end(fingerprint)
+
+            while len(self._artefatos) > self.max_artefatos:
+                _, caminho_antigo = self._artefatos.popitem(last=False)
+                try:
+                    os.remove(caminho_antigo)
+                except OSError:
+                    pass
+
+    def _iterar_chunks(self, df):
+        """Percorre o DataFrame em fatias de tamanho fixo"""
+        for inicio in range(0, len(df), self.tamanho_chunk):
+            yield df.iloc[inicio:inicio + self.tamanho_chunk]
+
+    def _escrever_csv(self, df, caminho, compactar=False):
+        """Escreve o CSV em partes, sem montar o arquivo inteiro em memória"""
+        abrir = gzip.open if compactar else open
+        with abrir(caminho, 'wt', encoding='utf-8', newline='') as arquivo:
+            if df.empty:
+                df.to_csv(arquivo, index=False)
+                return
+
+            for i, chunk in enumerate(self._iterar_chunks(df)):
+                chunk.to_csv(arquivo, index=False, header=(i == 0))
+
+    def _escrever_parquet(self, df, caminho):
+        """Escreve o Parquet em row groups, um por chunk"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Colunas object podem misturar tipos; exporta como texto
+        schema = pa.Schema.from_pandas(
+            self._normalizar_para_arrow(df.iloc[:0]), preserve_index=False)
+
+        with pq.ParquetWriter(caminho, schema) as writer:
+            for chunk in self._iterar_chunks(df):
+                tabela = pa.Table.from_pandas(
+                    self._normalizar_para_arrow(chunk), schema=schema, preserve_index=False)
+                writer.write_table(tabela)
+
+    def _normalizar_para_arrow(self, df):
+        """Converte colunas object para string para manter o schema estável"""
+        colunas_object = df.select_dtypes(include='object').columns
+        if len(colunas_object) == 0:
+            return df
+
+        df = df.copy()
+        for coluna in colunas_object:
+            df[coluna] = df[coluna].astype('string')
+        return df
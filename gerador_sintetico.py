@@ -0,0 +1,272 @@
+import argparse
+import json
+import os
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+
+# Distribuição padrão dos status (mesmos status das planilhas reais)
+DISTRIBUICAO_STATUS_PADRAO = {
+    "LEAD PERDIDO": 1,
+    "EM PROGRESSO": 1,
+    "PAGO": 1,
+    "NÃO RESPONDE": 1,
+    "AGUARDANDO RETORNO": 1,
+    "NEGOCIANDO": 1,
+    "INTERESSADO": 1
+}
+
+# Formatos de data escritos nas planilhas e sua frequência
+MISTURA_FORMATOS_DATA_PADRAO = {
+    "dd/mm/yyyy": 1,
+    "dd/mm/yy": 1,
+    "dd/mm": 1
+}
+
+# Cabeçalho das planilhas: A=Data, B=Aluno, C=Telefone, D=Observação, E=Status
+CABECALHO_PLANILHA = ["DATA", "NOME DO ALUNO", "TELEFONE", "OBSERVAÇÃO", "STATUS"]
+
+
+def _normalizar_pesos(pesos):
+    """Converte um dict valor -> peso em (valores, probabilidades)"""
+    valores = list(pesos.keys())
+    probabilidades = np.asarray(list(pesos.values()), dtype=float)
+    return valores, probabilidades / probabilidades.sum()
+
+
+def _tabela_texto(inicio, fim, largura):
+    """Tabela de números formatados com zeros à esquerda, indexada pelo próprio número"""
+    return np.array([str(numero).zfill(largura) for numero in range(inicio, fim)], dtype=object)
+
+
+def _formatar_datas(datas, formatos, rng, mistura):
+    """Formata as datas sorteando um formato por linha, sem strftime linha a linha"""
+    dias = pd.DatetimeIndex(datas)
+    dia_txt = _tabela_texto(0, 32, 2)[dias.day.to_numpy()]
+    mes_txt = _tabela_texto(0, 13, 2)[dias.month.to_numpy()]
+    ano_txt = dias.year.to_numpy().astype(str).astype(object)
+    ano_curto_txt = _tabela_texto(0, 100, 2)[dias.year.to_numpy() % 100]
+
+    dia_mes = dia_txt + '/' + mes_txt
+    escolhas = rng.choice(len(formatos), size=len(dias), p=mistura)
+
+    resultado = dia_mes.copy()
+    for indice, formato in enumerate(formatos):
+        mascara = escolhas == indice
+        if formato == "dd/mm/yyyy":
+            resultado[mascara] = dia_mes[mascara] + '/' + ano_txt[mascara]
+        elif formato == "dd/mm/yy":
+            resultado[mascara] = dia_mes[mascara] + '/' + ano_curto_txt[mascara]
+        elif formato != "dd/mm":
+            raise ValueError(f"Formato de data desconhecido: {formato}")
+
+    return resultado
+
+
+def _gerar_telefones(rng, n):
+    """Gera telefones no formato (DD) 9XXXX-XXXX"""
+    ddd = _tabela_texto(0, 100, 2)[rng.integers(11, 100, size=n)]
+    parte1 = _tabela_texto(0, 10000, 4)[rng.integers(1000, 10000, size=n)]
+    parte2 = _tabela_texto(0, 10000, 4)[rng.integers(1000, 10000, size=n)]
+    return '(' + ddd + ') 9' + parte1 + '-' + parte2
+
+
+def gerar_dados_sinteticos(n_linhas=800, vendedores=None, n_vendedores=6, abas=("Setembro",),
+                           dias_historico=120, data_referencia=None,
+                           mistura_formatos_data=None, taxa_duplicados=0.0,
+                           distribuicao_status=None, semente=None):
+    """Gera leads sintéticos no formato bruto das planilhas, de forma vetorizada
+
+    Retorna um DataFrame com Data (texto, formatos misturados), Aluno, Telefone,
+    Status, Vendedor e Aba — o mesmo formato de carregar_dados_demo.
+    """
+    rng = np.random.default_rng(semente)
+
+    if vendedores is None:
+        vendedores = [f"Vendedor {i + 1:03d}" for i in range(n_vendedores)]
+    vendedores = np.asarray(vendedores, dtype=object)
+    abas = np.asarray(list(abas), dtype=object)
+
+    # Datas: dias para trás a partir da data de referência
+    referencia = np.datetime64(
+        pd.Timestamp(data_referencia or pd.Timestamp.now()).normalize(), 'D')
+    datas = referencia - rng.integers(0, dias_historico + 1, size=n_linhas).astype('timedelta64[D]')
+
+    formatos, mistura = _normalizar_pesos(
+        mistura_formatos_data or MISTURA_FORMATOS_DATA_PADRAO)
+    datas_txt = _formatar_datas(datas, formatos, rng, mistura)
+
+    # 70% têm nome e 80% têm telefone; quem não tem nenhum ganha um dos dois
+    tem_nome = rng.random(n_linhas) > 0.3
+    tem_telefone = rng.random(n_linhas) > 0.2
+    nenhum = ~tem_nome & ~tem_telefone
+    recebe_nome = rng.random(n_linhas) > 0.5
+    tem_nome |= nenhum & recebe_nome
+    tem_telefone |= nenhum & ~recebe_nome
+
+    # Nomes sem palavras de cabeçalho ('aluno', 'nome'...): com um status como
+    # "LEAD PERDIDO" a linha seria descartada por remover_cabecalhos
+    nomes = 'Pessoa ' + _tabela_texto(0, 10000, 4)[rng.integers(1000, 10000, size=n_linhas)]
+    telefones = _gerar_telefones(rng, n_linhas)
+
+    status_lista, probabilidades_status = _normalizar_pesos(
+        distribuicao_status or DISTRIBUICAO_STATUS_PADRAO)
+    status = np.asarray(status_lista, dtype=object)[
+        rng.choice(len(status_lista), size=n_linhas, p=probabilidades_status)]
+
+    df = pd.DataFrame({
+        'Data': datas_txt,
+        'Aluno': np.where(tem_nome, nomes, ''),
+        'Telefone': np.where(tem_telefone, telefones, ''),
+        'Status': status,
+        'Vendedor': vendedores[rng.integers(0, len(vendedores), size=n_linhas)],
+        'Aba': abas[rng.integers(0, len(abas), size=n_linhas)]
+    })
+
+    # Duplicados: algumas linhas viram cópias de outras linhas do mesmo conjunto
+    if taxa_duplicados > 0 and n_linhas > 1:
+        destinos = np.flatnonzero(rng.random(n_linhas) < taxa_duplicados)
+        origens = rng.integers(0, n_linhas, size=len(destinos))
+        df.iloc[destinos] = df.iloc[origens].to_numpy()
+
+    return df
+
+
+def gerar_sheet_ids(vendedores):
+    """Sheet IDs fictícios e estáveis para cada vendedor"""
+    return {vendedor: f"sintetico-{indice:04d}" for indice, vendedor in enumerate(vendedores)}
+
+
+def escrever_csvs_planilhas(df, diretorio, sheet_ids=None):
+    """Escreve um CSV por (vendedor, aba) no formato exportado pelo Google Sheets
+
+    Retorna o mapa vendedor -> sheet_id usado nos nomes dos arquivos.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    sheet_ids = sheet_ids or gerar_sheet_ids(sorted(df['Vendedor'].unique()))
+
+    for (vendedor, aba), df_planilha in df.groupby(['Vendedor', 'Aba'], sort=False):
+        planilha = pd.DataFrame({
+            CABECALHO_PLANILHA[0]: df_planilha['Data'].to_numpy(),
+            CABECALHO_PLANILHA[1]: df_planilha['Aluno'].to_numpy(),
+            CABECALHO_PLANILHA[2]: df_planilha['Telefone'].to_numpy(),
+            CABECALHO_PLANILHA[3]: '',
+            CABECALHO_PLANILHA[4]: df_planilha['Status'].to_numpy()
+        })
+        caminho = os.path.join(diretorio, f"{sheet_ids[vendedor]}__{aba}.csv")
+        planilha.to_csv(caminho, index=False)
+
+    return sheet_ids
+
+
+def escrever_registro(caminho, sheet_ids, abas, url_base):
+    """Escreve um vendedores.json apontando as fontes para o stub local"""
+    config = {
+        "padrao": {"url_base": url_base},
+        "abas": list(abas),
+        "vendedores": {vendedor: {"sheet_id": sheet_id} for vendedor, sheet_id in sheet_ids.items()}
+    }
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(config, arquivo, ensure_ascii=False, indent=2)
+
+
+def criar_servidor_stub(diretorio, porta=8765, taxa_429=0.0, atraso=0.0, taxa_html=0.0):
+    """Servidor HTTP local que imita os endpoints de export/gviz do Google Sheets
+
+    Pode simular limitação (429), lentidão e páginas de login HTML.
+    """
+
+    class ManipuladorPlanilhas(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            partes = url.path.strip('/').split('/')
+            parametros = parse_qs(url.query)
+
+            if atraso:
+                time.sleep(atraso)
+
+            if random.random() < taxa_429:
+                self._responder(429, b"Too Many Requests", "text/plain", {'Retry-After': '1'})
+                return
+
+            if random.random() < taxa_html:
+                self._responder(200, b"<!DOCTYPE html><html><body>Login</body></html>", "text/html")
+                return
+
+            # /spreadsheets/d/<sheet_id>/export ou /spreadsheets/d/<sheet_id>/gviz/tq
+            if len(partes) < 4 or partes[:2] != ['spreadsheets', 'd']:
+                self._responder(404, b"Not Found", "text/plain")
+                return
+
+            sheet_id = partes[2]
+            aba = parametros.get('sheet', [None])[0]
+            if aba is None:
+                # Sem nome de aba: usa a primeira aba existente da planilha
+                existentes = sorted(nome for nome in os.listdir(diretorio)
+                                    if nome.startswith(f"{sheet_id}__"))
+                caminho = os.path.join(diretorio, existentes[0]) if existentes else None
+            else:
+                caminho = os.path.join(diretorio, f"{sheet_id}__{aba}.csv")
+
+            if not caminho or not os.path.exists(caminho):
+                self._responder(404, b"Not Found", "text/plain")
+                return
+
+            with open(caminho, 'rb') as arquivo:
+                self._responder(200, arquivo.read(), "text/csv; charset=utf-8")
+
+        def _responder(self, status, corpo, tipo_conteudo, cabecalhos=None):
+            self.send_response(status)
+            self.send_header('Content-Type', tipo_conteudo)
+            self.send_header('Content-Length', str(len(corpo)))
+            for nome, valor in (cabecalhos or {}).items():
+                self.send_header(nome, valor)
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, formato, *args):
+            pass
+
+    return ThreadingHTTPServer(('127.0.0.1', porta), ManipuladorPlanilhas)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Gera leads sintéticos e, opcionalmente, serve-os como planilhas locais")
+    parser.add_argument('--linhas', type=int, default=100_000)
+    parser.add_argument('--vendedores', type=int, default=6)
+    parser.add_argument('--abas', nargs='+', default=["Setembro"])
+    parser.add_argument('--duplicados', type=float, default=0.0)
+    parser.add_argument('--semente', type=int, default=None)
+    parser.add_argument('--diretorio', default='dados_sinteticos')
+    parser.add_argument('--servir', action='store_true',
+                        help="Sobe o stub HTTP depois de gerar os CSVs")
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--taxa-429', type=float, default=0.0)
+    parser.add_argument('--atraso', type=float, default=0.0)
+    args = parser.parse_args()
+
+    df = gerar_dados_sinteticos(
+        n_linhas=args.linhas, n_vendedores=args.vendedores, abas=args.abas,
+        taxa_duplicados=args.duplicados, semente=args.semente)
+    sheet_ids = escrever_csvs_planilhas(df, args.diretorio)
+
+    url_base = f"http://127.0.0.1:{args.porta}"
+    caminho_registro = os.path.join(args.diretorio, 'vendedores.json')
+    escrever_registro(caminho_registro, sheet_ids, args.abas, url_base)
+    print(f"{len(df)} linhas geradas em {args.diretorio} (registro: {caminho_registro})")
+
+    if args.servir:
+        servidor = criar_servidor_stub(
+            args.diretorio, args.porta, taxa_429=args.taxa_429, atraso=args.atraso)
+        print(f"Stub servindo em {url_base} (use DASH_SHEETS_VENDEDORES={caminho_registro})")
+        servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
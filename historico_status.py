@@ -0,0 +1,223 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+from utils import canonizar_status_serie, categorizar_status_serie
+
+
+# Variável de ambiente com o arquivo (JSON lines) onde as transições são gravadas
+VARIAVEL_HISTORICO = "DASH_SHEETS_HISTORICO"
+
+COLUNAS_EVENTO = ['Chave', 'Vendedor', 'Aba', 'Data', 'Status_Anterior',
+                  'Status_Novo', 'Detectado_Em']
+
+
+def _normalizar_texto(serie):
+    """Minúsculas, sem acentos e com espaços colapsados (vetorizado)"""
+    return (serie.fillna('').astype(str)
+            .str.normalize('NFKD')
+            .str.encode('ascii', errors='ignore')
+            .str.decode('ascii')
+            .str.lower()
+            .str.replace(r'\s+', ' ', regex=True)
+            .str.strip())
+
+
+def gerar_chaves_linhas(df):
+    """Gera a chave de cada lead: telefone (só dígitos) ou nome normalizado, mais a data"""
+    telefone = df['Telefone'].fillna('').astype(str).str.replace(r'\D', '', regex=True)
+    nome = _normalizar_texto(df['Aluno'])
+
+    # Telefone identifica melhor; sem ele, usa o nome
+    identificador = ('t:' + telefone).where(telefone != '', 'n:' + nome)
+    data = pd.to_datetime(df['Data'], errors='coerce').dt.strftime('%Y-%m-%d').fillna('')
+
+    return identificador + '|' + data
+
+
+def normalizar_status_snapshot(serie):
+    """Status canônico (mesma normalização e sinônimos dos KPIs) para comparar cargas"""
+    return canonizar_status_serie(serie)
+
+
+class HistoricoStatus:
+    """Log de transições de status entre cargas sucessivas de cada (vendedor, aba)
+
+    Com `caminho`, o log (JSON lines) e o snapshot da última carga de cada fonte
+    ficam em disco (em `<caminho>.snapshots/`): um restart não perde a base de
+    comparação, e réplicas que compartilham o arquivo comparam com o mesmo
+    snapshot, sem registrar de novo uma transição que outra já gravou.
+    """
+
+    def __init__(self, caminho=None):
+        self.caminho = caminho
+
+        # (vendedor, aba) -> Series chave -> status da última carga (sem caminho)
+        self._snapshots = {}
+        self._eventos = []
+        # Quanto do arquivo de eventos já foi lido (outras réplicas podem acrescentar)
+        self._posicao = 0
+        self._lock = threading.Lock()
+
+        if caminho:
+            os.makedirs(self._diretorio_snapshots(), exist_ok=True)
+            self._ler_novos_eventos()
+
+    def _diretorio_snapshots(self):
+        return f"{self.caminho}.snapshots"
+
+    def _caminho_snapshot(self, vendedor, aba):
+        nome = hashlib.sha1(f"{vendedor}|{aba}".encode('utf-8')).hexdigest()
+        return os.path.join(self._diretorio_snapshots(), f"{nome}.json")
+
+    @contextmanager
+    def _trava_arquivo(self):
+        """Exclusão entre processos/réplicas durante a comparação e a gravação"""
+        import fcntl
+
+        with open(f"{self.caminho}.lock", 'a') as arquivo:
+            fcntl.flock(arquivo, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+    def _ler_novos_eventos(self):
+        """Acrescenta ao log em memória as linhas completas gravadas desde a última leitura"""
+        try:
+            with open(self.caminho, 'rb') as arquivo:
+                arquivo.seek(self._posicao)
+                conteudo = arquivo.read()
+        except FileNotFoundError:
+            return
+
+        # Uma linha sem \n ainda está sendo gravada: fica para a próxima leitura
+        completo = conteudo[:conteudo.rfind(b'\n') + 1]
+        self._posicao += len(completo)
+        self._eventos.extend(
+            json.loads(linha) for linha in completo.decode('utf-8').splitlines() if linha.strip())
+
+    def _ler_snapshot(self, vendedor, aba):
+        """Snapshot da última carga da fonte, ou None na primeira carga"""
+        if not self.caminho:
+            return self._snapshots.get((vendedor, aba))
+
+        try:
+            with open(self._caminho_snapshot(vendedor, aba), encoding='utf-8') as arquivo:
+                return pd.Series(json.load(arquivo), dtype=object)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _gravar_snapshot(self, vendedor, aba, snapshot):
+        """Troca o snapshot da fonte de uma vez (leitores nunca veem o arquivo pela metade)"""
+        if not self.caminho:
+            self._snapshots[(vendedor, aba)] = snapshot
+            return
+
+        destino = self._caminho_snapshot(vendedor, aba)
+        descritor, temporario = tempfile.mkstemp(dir=self._diretorio_snapshots(), suffix='.tmp')
+        try:
+            with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+                json.dump(snapshot.to_dict(), arquivo, ensure_ascii=False)
+            os.replace(temporario, destino)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+
+    def registrar_carga(self, df, vendedor, aba):
+        """Compara a carga com a anterior da mesma fonte e grava só as mudanças de status
+
+        Retorna o DataFrame de transições detectadas (vazio na primeira carga).
+        """
+        if df.empty:
+            return pd.DataFrame(columns=COLUNAS_EVENTO)
+
+        atual = pd.DataFrame({
+            'Chave': gerar_chaves_linhas(df).to_numpy(),
+            'Data': pd.to_datetime(df['Data'], errors='coerce').dt.strftime('%Y-%m-%d').to_numpy(),
+            'Status_Novo': normalizar_status_snapshot(df['Status']).to_numpy()
+        })
+        # Linhas repetidas com a mesma chave: vale a última da planilha
+        atual = atual.drop_duplicates('Chave', keep='last')
+        snapshot = atual.set_index('Chave')['Status_Novo']
+
+        with self._lock, (self._trava_arquivo() if self.caminho else nullcontext()):
+            anterior = self._ler_snapshot(vendedor, aba)
+            self._gravar_snapshot(vendedor, aba, snapshot)
+
+            if anterior is None:
+                return pd.DataFrame(columns=COLUNAS_EVENTO)
+
+            # Hash join pela chave: só leads presentes nas duas cargas
+            comparacao = atual.join(anterior.rename('Status_Anterior'), on='Chave', how='inner')
+            mudancas = comparacao[comparacao['Status_Anterior'] != comparacao['Status_Novo']]
+
+            if mudancas.empty:
+                return pd.DataFrame(columns=COLUNAS_EVENTO)
+
+            eventos = mudancas.assign(
+                Vendedor=vendedor, Aba=aba, Detectado_Em=time.time())[COLUNAS_EVENTO]
+            registros = eventos.to_dict('records')
+
+            if self.caminho:
+                # Lidos de volta pelo log, junto com os de outras réplicas
+                with open(self.caminho, 'a', encoding='utf-8') as arquivo:
+                    for registro in registros:
+                        arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            else:
+                self._eventos.extend(registros)
+
+        return eventos.reset_index(drop=True)
+
+    def obter_eventos(self, vendedores=None, aba=None, data_inicio=None, data_fim=None):
+        """Retorna o log de transições de status, filtrado por vendedor, aba e data do lead"""
+        with self._lock:
+            if self.caminho:
+                self._ler_novos_eventos()
+            eventos = pd.DataFrame(self._eventos, columns=COLUNAS_EVENTO)
+
+        eventos['Detectado_Em'] = pd.to_datetime(eventos['Detectado_Em'], unit='s')
+        eventos['Data'] = pd.to_datetime(eventos['Data'], errors='coerce')
+
+        filtro = pd.Series(True, index=eventos.index)
+        if vendedores:
+            filtro &= eventos['Vendedor'].isin(vendedores)
+        if aba is not None:
+            filtro &= eventos['Aba'] == aba
+        if data_inicio is not None and data_fim is not None:
+            filtro &= eventos['Data'].between(
+                pd.to_datetime(data_inicio), pd.to_datetime(data_fim))
+
+        return eventos[filtro].reset_index(drop=True)
+
+    def calcular_tempo_ate_fechamento(self, vendedores=None, aba=None, data_inicio=None,
+                                      data_fim=None, categoria_fechamento="Fechado"):
+        """Dias entre a criação do lead e a detecção da mudança para um status de fechamento"""
+        eventos = self.obter_eventos(vendedores, aba, data_inicio, data_fim)
+        # Mesma categorização dos KPIs: "Pago!", "QUITADO" etc. contam como fechamento
+        fechamentos = eventos[
+            categorizar_status_serie(eventos['Status_Novo']) == categoria_fechamento]
+
+        if fechamentos.empty:
+            return pd.DataFrame(columns=['Chave', 'Vendedor', 'Dias_Ate_Fechamento'])
+
+        # Primeira vez que cada lead foi visto como fechado
+        fechamentos = fechamentos.sort_values('Detectado_Em').drop_duplicates(
+            ['Vendedor', 'Chave'], keep='first')
+
+        return pd.DataFrame({
+            'Chave': fechamentos['Chave'],
+            'Vendedor': fechamentos['Vendedor'],
+            'Dias_Ate_Fechamento': (
+                fechamentos['Detectado_Em'] - fechamentos['Data']).dt.days
+        }).reset_index(drop=True)
+
+
+def obter_historico_configurado():
+    """Cria o histórico, gravando em disco se DASH_SHEETS_HISTORICO estiver definido"""
+    return HistoricoStatus(os.environ.get(VARIAVEL_HISTORICO))
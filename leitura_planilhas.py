@@ -0,0 +1,266 @@
+import os
+from io import BytesIO, StringIO
+
+import pandas as pd
+from config_vendedores import URL_BASE_PADRAO
+from utils import processar_datas_serie, marcar_datas_suspeitas
+
+
+# Leitura e limpeza das planilhas sem Streamlit: usadas pelo GoogleSheetsLoader
+# (que mostra a depuração na página) e pelo carregador assíncrono, em threads
+
+# Tempo máximo (segundos) para carregar todos os vendedores de uma aba
+PRAZO_CARGA = 120
+
+# Limites de leitura das respostas: tamanho máximo e prefixo inspecionado
+TAMANHO_MAXIMO_RESPOSTA = 20 * 1024 * 1024
+TAMANHO_SNIFF = 2048
+TAMANHO_MINIMO_CSV = 50
+
+# Tipos de conteúdo aceitos como CSV (o Google usa text/csv; alguns proxies mudam)
+TIPOS_CONTEUDO_CSV = ('text/csv', 'text/plain',
+                      'application/octet-stream', 'application/csv')
+
+# Início de documentos HTML (páginas de login ou de erro do Google)
+PREFIXOS_HTML = (b'<!doctype html', b'<html', b'<head', b'<body', b'<?xml')
+
+# Variável de ambiente que ativa o modo Arrow ("1"): leitor CSV do pyarrow e
+# colunas pd.ArrowDtype do corpo da resposta até os agregados
+VARIAVEL_ARROW = "DASH_SHEETS_ARROW"
+
+
+def _parece_html(prefixo):
+    """Indica se o início do corpo é um documento HTML"""
+    return prefixo.lstrip().lower().startswith(PREFIXOS_HTML)
+
+
+def classificar_cabecalhos(status, cabecalhos):
+    """Classifica a resposta só pelos cabeçalhos; retorna o motivo da rejeição ou None"""
+    if status != 200:
+        return f"Status {status}"
+
+    tipo_conteudo = cabecalhos.get('Content-Type', '').split(';')[0].strip().lower()
+    if tipo_conteudo and tipo_conteudo not in TIPOS_CONTEUDO_CSV:
+        return f"Conteúdo não é CSV ({tipo_conteudo})"
+
+    tamanho = cabecalhos.get('Content-Length')
+    if tamanho and tamanho.isdigit() and int(tamanho) > TAMANHO_MAXIMO_RESPOSTA:
+        return f"Resposta muito grande ({int(tamanho)} bytes)"
+
+    return None
+
+
+class LeitorCorpoCsv:
+    """Acumula o corpo em partes, abortando cedo em HTML ou acima do tamanho máximo"""
+
+    def __init__(self, tamanho_maximo=TAMANHO_MAXIMO_RESPOSTA):
+        self.tamanho_maximo = tamanho_maximo
+        self.partes = []
+        self.tamanho_lido = 0
+        self.prefixo_verificado = False
+
+    def adicionar(self, parte):
+        """Acrescenta uma parte do corpo; retorna o motivo para abortar ou None"""
+        if not parte:
+            return None
+
+        self.partes.append(parte)
+        self.tamanho_lido += len(parte)
+
+        # Só o início do corpo é inspecionado, não o arquivo inteiro
+        if not self.prefixo_verificado and self.tamanho_lido >= TAMANHO_SNIFF:
+            if _parece_html(b''.join(self.partes)[:TAMANHO_SNIFF]):
+                return "Página HTML (login ou erro)"
+            self.prefixo_verificado = True
+
+        if self.tamanho_lido > self.tamanho_maximo:
+            return f"Resposta acima de {self.tamanho_maximo} bytes"
+
+        return None
+
+    def finalizar(self, decodificar=True):
+        """Retorna (conteudo, motivo_rejeicao): apenas um dos dois é preenchido
+
+        Com decodificar=False o conteúdo volta em bytes (para o leitor do pyarrow).
+        """
+        corpo = b''.join(self.partes)
+        if not self.prefixo_verificado and _parece_html(corpo[:TAMANHO_SNIFF]):
+            return None, "Página HTML (login ou erro)"
+
+        if len(corpo) <= TAMANHO_MINIMO_CSV:
+            return None, "Conteúdo vazio ou insuficiente"
+
+        if not decodificar:
+            return corpo, None
+
+        # Tenta decodificar o conteúdo
+        try:
+            return corpo.decode('utf-8'), None
+        except UnicodeDecodeError:
+            return corpo.decode('latin-1'), None
+
+
+def arrow_habilitado():
+    """Indica se o modo Arrow foi ativado pelo ambiente"""
+    return os.environ.get(VARIAVEL_ARROW, '').strip().lower() in ('1', 'true', 'sim')
+
+
+def ler_csv(conteudo, usar_arrow=False):
+    """Lê o CSV baixado: texto com o leitor do pandas ou bytes com o leitor do pyarrow"""
+    if not usar_arrow:
+        return pd.read_csv(StringIO(conteudo))
+
+    try:
+        return pd.read_csv(BytesIO(conteudo), engine='pyarrow', dtype_backend='pyarrow')
+    except (UnicodeDecodeError, ValueError):
+        # Planilhas exportadas fora de UTF-8 (o pyarrow acusa UTF-8 inválido)
+        return pd.read_csv(BytesIO(conteudo), engine='pyarrow', dtype_backend='pyarrow',
+                           encoding='latin-1')
+
+
+def montar_urls(sheet_id, aba_selecionada, formato_url="export", url_base=URL_BASE_PADRAO):
+    """Monta a lista de URLs a tentar, começando pelo formato preferido da fonte"""
+    url_base = url_base.rstrip('/')
+    urls_export = [
+        # Formato 1: Export CSV com nome da aba
+        f"{url_base}/spreadsheets/d/{sheet_id}/export?format=csv&sheet={aba_selecionada}",
+        # Formato 3: Export CSV com GID 0 (primeira aba)
+        f"{url_base}/spreadsheets/d/{sheet_id}/export?format=csv&gid=0",
+    ]
+    urls_gviz = [
+        # Formato 2: gviz com nome da aba
+        f"{url_base}/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&sheet={aba_selecionada}",
+        # Formato 4: gviz com GID 0
+        f"{url_base}/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&gid=0",
+    ]
+    preferidas, alternativas = (
+        (urls_gviz, urls_export) if formato_url == "gviz" else (urls_export, urls_gviz))
+
+    return [
+        preferidas[0],
+        alternativas[0],
+        preferidas[1],
+        alternativas[1],
+        # Formato 5: Export CSV sem especificar aba (pega a primeira)
+        f"{url_base}/spreadsheets/d/{sheet_id}/export?format=csv",
+        # Formato 6: Tentativa com diferentes GIDs
+        f"{url_base}/spreadsheets/d/{sheet_id}/export?format=csv&gid=1",
+        f"{url_base}/spreadsheets/d/{sheet_id}/export?format=csv&gid=2",
+    ]
+
+
+def remover_cabecalhos(df):
+    """Detecta e remove linhas de cabeçalho automaticamente"""
+    if df.empty:
+        return df
+
+    # Palavras-chave que indicam cabeçalhos
+    palavras_cabecalho = [
+        'data', 'nome', 'aluno', 'telefone', 'status', 'lead',
+        'cliente', 'contato', 'whatsapp', 'celular', 'situacao'
+    ]
+
+    linhas_para_remover = []
+
+    # Verifica as primeiras 5 linhas
+    for i in range(min(5, len(df))):
+        linha_str = ' '.join(df.iloc[i].astype(str)).lower()
+
+        # Se encontrar 2 ou mais palavras-chave, considera cabeçalho
+        palavras_encontradas = sum(
+            1 for palavra in palavras_cabecalho if palavra in linha_str)
+        if palavras_encontradas >= 2:
+            linhas_para_remover.append(i)
+
+    # Remove as linhas identificadas como cabeçalho
+    if linhas_para_remover:
+        df = df.drop(df.index[linhas_para_remover]).reset_index(drop=True)
+
+    return df
+
+
+def mapear_colunas(df, usar_arrow=False):
+    """Mapeia as colunas de forma inteligente baseado no conteúdo"""
+    df_limpo = pd.DataFrame()
+
+    # Mapeia as colunas baseado na posição (padrão)
+    # Coluna A (índice 0) = Data
+    df_limpo['Data'] = df.iloc[:, 0] if len(df.columns) > 0 else ""
+
+    # Coluna B (índice 1) = Aluno
+    df_limpo['Aluno'] = df.iloc[:, 1] if len(df.columns) > 1 else ""
+
+    # Coluna C (índice 2) = Telefone
+    df_limpo['Telefone'] = df.iloc[:, 2] if len(df.columns) > 2 else ""
+
+    # Coluna E (índice 4) = Status, com fallbacks
+    if len(df.columns) >= 5:
+        df_limpo['Status'] = df.iloc[:, 4]  # Coluna E
+    elif len(df.columns) >= 4:
+        df_limpo['Status'] = df.iloc[:, 3]  # Coluna D
+    else:
+        df_limpo['Status'] = 'EM PROGRESSO'  # Padrão
+
+    if usar_arrow:
+        # O pyarrow infere números (ex.: telefones); aqui tudo vira texto Arrow
+        import pyarrow as pa
+        texto = pd.ArrowDtype(pa.string())
+        df_limpo = df_limpo.astype({'Data': texto, 'Aluno': texto,
+                                    'Telefone': texto, 'Status': texto})
+
+    return df_limpo
+
+
+def limpar_planilha(df, vendedor, aba_selecionada, usar_arrow=False):
+    """Limpa o CSV bruto de um vendedor; retorna (df_limpo, aviso)
+
+    O aviso explica por que a planilha foi descartada (df_limpo vazio) ou é None.
+    """
+    # Remove colunas completamente vazias
+    df = df.dropna(axis=1, how='all')
+
+    if df.empty or len(df.columns) < 3:
+        return pd.DataFrame(), "DataFrame vazio ou com poucas colunas após limpeza"
+
+    # Detecta e remove linhas de cabeçalho
+    df = remover_cabecalhos(df)
+
+    # Garante que temos pelo menos 3 colunas (Data, Aluno, Telefone)
+    if len(df.columns) < 3:
+        return pd.DataFrame(), "Menos de 3 colunas disponíveis"
+
+    # Mapeia as colunas de forma inteligente
+    df_limpo = mapear_colunas(df, usar_arrow)
+
+    # Processa as datas de forma inteligente, numa passada para a planilha
+    # inteira: o ano das datas dd/mm vem do mês da aba e da ordem das linhas
+    df_limpo['Data_Original'] = df_limpo['Data'].copy()
+    df_limpo['Data'] = processar_datas_serie(
+        df_limpo['Data'], aba_selecionada)
+
+    # Remove apenas linhas onde TANTO data quanto aluno/telefone estão vazios
+    # (permite leads só com telefone ou só com nome)
+    if usar_arrow:
+        # Valor ausente conta como preenchido, como no caminho abaixo ('nan' != '')
+        tem_aluno = (df_limpo['Aluno'].str.strip() != '').fillna(True)
+        tem_telefone = (df_limpo['Telefone'].str.strip() != '').fillna(True)
+    else:
+        tem_aluno = df_limpo['Aluno'].astype(str).str.strip() != ''
+        tem_telefone = df_limpo['Telefone'].astype(str).str.strip() != ''
+
+    condicoes_validas = (
+        (df_limpo['Data'].notna()) &  # Data deve ser válida
+        (tem_aluno | tem_telefone)    # Nome OU telefone
+    )
+
+    df_limpo = df_limpo[condicoes_validas]
+
+    # Datas no futuro ou fora do período da aba ficam marcadas para revisão
+    df_limpo['Data_Suspeita'] = marcar_datas_suspeitas(
+        df_limpo['Data'], aba_selecionada)
+
+    # Adiciona informações do vendedor e aba
+    df_limpo['Vendedor'] = vendedor
+    df_limpo['Aba'] = aba_selecionada
+
+    return df_limpo, None
@@ -0,0 +1,224 @@
+import asyncio
+import time
+
+import pandas as pd
+from agendador import (STATUS_REPETIVEIS, CircuitoAbertoError, PrazoEsgotadoError,
+                       obter_agendador_padrao)
+from cache_compartilhado import obter_cache_padrao, obter_fonte, salvar_fonte
+from config_vendedores import RegistroVendedores
+from leitura_planilhas import (PRAZO_CARGA, LeitorCorpoCsv, arrow_habilitado,
+                               classificar_cabecalhos, ler_csv, limpar_planilha, montar_urls)
+
+
+# Downloads simultâneos no total e por host
+MAX_CONCORRENCIA = 4
+MAX_CONEXOES_POR_HOST = 4
+
+TAMANHO_PARTE = 64 * 1024
+
+
+class CarregadorSheetsAssincrono:
+    """Versão asyncio do GoogleSheetsLoader, sem dependência do Streamlit
+
+    Usa o aiohttp (importado só aqui) e devolve os mesmos DataFrames processados
+    que GoogleSheetsLoader.carregar_todos_dados. Os downloads respeitam o balde de
+    tokens e o disjuntor por host do agendador e as fontes passam pelo mesmo cache.
+    A trava de atualização do cache não é usada (bloquearia o event loop): duas
+    cargas simultâneas da mesma fonte podem baixá-la em dobro.
+    """
+
+    def __init__(self, registro=None, max_concorrencia=MAX_CONCORRENCIA,
+                 prazo_carga=PRAZO_CARGA, sessao=None, usar_arrow=None,
+                 agendador=None, cache=None):
+        self.registro = registro or RegistroVendedores()
+        self.max_concorrencia = max_concorrencia
+        self.prazo_carga = prazo_carga
+
+        # Sessão aiohttp externa (ex.: a do servidor web ou um stub local)
+        self._sessao = sessao
+
+        # Mesmos limites por host e mesmo cache das fontes do loader síncrono
+        self.agendador = agendador or obter_agendador_padrao()
+        self.cache = cache or obter_cache_padrao()
+
+        self.usar_arrow = arrow_habilitado() if usar_arrow is None else usar_arrow
+
+    async def _baixar_csv(self, sessao, url, timeout):
+        """Baixa uma URL; retorna (status, cabecalhos, conteudo, motivo_rejeicao)"""
+        import aiohttp
+
+        async with sessao.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as resposta:
+            # Rejeita pelos cabeçalhos antes de ler o corpo
+            motivo = classificar_cabecalhos(resposta.status, resposta.headers)
+            if motivo:
+                return resposta.status, resposta.headers, None, motivo
+
+            leitor = LeitorCorpoCsv()
+            async for parte in resposta.content.iter_chunked(TAMANHO_PARTE):
+                motivo = leitor.adicionar(parte)
+                if motivo:
+                    return resposta.status, resposta.headers, None, motivo
+
+            conteudo, motivo = leitor.finalizar(decodificar=not self.usar_arrow)
+            return resposta.status, resposta.headers, conteudo, motivo
+
+    async def _obter_com_limites(self, sessao, url, timeout, prazo, semaforo):
+        """Equivalente assíncrono de AgendadorRequisicoes.obter; retorna (conteudo, motivo)
+
+        Usa o balde de tokens, o disjuntor e o backoff do agendador do processo,
+        então cargas síncronas e assíncronas dividem o mesmo ritmo por host.
+        """
+        import aiohttp
+
+        balde, disjuntor = self.agendador.controles_host(url)
+        motivo = None
+
+        for tentativa in range(self.agendador.max_tentativas):
+            if not disjuntor.permitir():
+                raise CircuitoAbertoError(f"Circuito aberto para {url}")
+
+            espera = balde.reservar()
+            restante = prazo - time.monotonic()
+            if espera >= restante:
+                raise PrazoEsgotadoError(f"Prazo esgotado antes de {url}")
+            if espera > 0:
+                await asyncio.sleep(espera)
+
+            cabecalhos = None
+            try:
+                async with semaforo:
+                    status, cabecalhos, conteudo, motivo = await self._baixar_csv(
+                        sessao, url, min(timeout, restante - espera))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                disjuntor.registrar_falha()
+                motivo = f"Erro de conexão - {str(e) or type(e).__name__}"
+            else:
+                if status not in STATUS_REPETIVEIS:
+                    # 200 ou erro definitivo (ex.: 404): o host está respondendo
+                    disjuntor.registrar_sucesso()
+                    return conteudo, motivo
+                disjuntor.registrar_falha()
+
+            if tentativa + 1 < self.agendador.max_tentativas:
+                backoff = self.agendador.calcular_backoff(tentativa, cabecalhos)
+                if backoff >= prazo - time.monotonic():
+                    break
+                await asyncio.sleep(backoff)
+
+        return None, motivo
+
+    async def _baixar_fonte(self, sessao, fonte, aba_selecionada, semaforo, prazo):
+        """Tenta as URLs da fonte em ordem e processa o primeiro CSV válido"""
+        vendedor = fonte['vendedor']
+        urls_tentativas = montar_urls(
+            fonte['sheet_id'], aba_selecionada, fonte['formato_url'], fonte['url_base'])
+
+        for url in urls_tentativas:
+            try:
+                content, motivo = await self._obter_com_limites(
+                    sessao, url, fonte['timeout'], prazo, semaforo)
+            except (CircuitoAbertoError, PrazoEsgotadoError):
+                # Host bloqueado ou prazo esgotado: não insiste nas outras URLs
+                break
+
+            if motivo:
+                continue
+
+            # Parse e limpeza fora do event loop
+            df = await asyncio.to_thread(self._processar_csv, content, vendedor, aba_selecionada)
+            if df is not None:
+                return df
+
+        return pd.DataFrame()
+
+    async def carregar_dados_vendedor(self, sessao, fonte, aba_selecionada, semaforo, prazo=None):
+        """Carrega a fonte pelo cache ou pela rede; em falha, usa a última versão em cache"""
+        prazo = prazo or time.monotonic() + self.prazo_carga
+
+        # Fontes inalteradas e dentro do TTL não são baixadas de novo
+        df_cache = await asyncio.to_thread(obter_fonte, self.cache, fonte, aba_selecionada)
+        if df_cache is not None:
+            return df_cache
+
+        df = await self._baixar_fonte(sessao, fonte, aba_selecionada, semaforo, prazo)
+        if not df.empty:
+            await asyncio.to_thread(salvar_fonte, self.cache, fonte, aba_selecionada, df)
+            return df
+
+        # Falhou (ex.: Google limitando): serve a última versão em cache
+        df_cache = await asyncio.to_thread(
+            obter_fonte, self.cache, fonte, aba_selecionada, True)
+        return df if df_cache is None else df_cache
+
+    def _processar_csv(self, content, vendedor, aba_selecionada):
+        """Lê o CSV e aplica a mesma limpeza do loader síncrono (sem Streamlit, roda em thread)"""
+        try:
+            df = ler_csv(content, self.usar_arrow)
+        except Exception:
+            return None
+
+        if df.empty:
+            return None
+
+        try:
+            df_limpo, _ = limpar_planilha(df, vendedor, aba_selecionada, self.usar_arrow)
+        except Exception:
+            return pd.DataFrame()
+        return df_limpo
+
+    async def carregar_todos_dados(self, aba_selecionada="Setembro"):
+        """Carrega todos os vendedores da aba em paralelo, respeitando o prazo total
+
+        Vendedores que não terminam dentro do prazo ficam de fora do resultado.
+        Cancelar a tarefa que aguarda este método cancela todos os downloads.
+        """
+        import aiohttp
+
+        semaforo = asyncio.Semaphore(self.max_concorrencia)
+        prazo = time.monotonic() + self.prazo_carga
+        tarefas = []
+        sessao = self._sessao
+        sessao_propria = sessao is None
+        if sessao_propria:
+            sessao = aiohttp.ClientSession(connector=aiohttp.TCPConnector(
+                limit_per_host=MAX_CONEXOES_POR_HOST))
+
+        try:
+            tarefas = [
+                asyncio.create_task(self.carregar_dados_vendedor(
+                    sessao, fonte, aba_selecionada, semaforo, prazo))
+                for fonte in self.registro.obter_fontes().values()
+            ]
+            if not tarefas:
+                return pd.DataFrame()
+
+            # Ao fim do prazo, fica com o que já terminou e cancela o resto
+            concluidas, pendentes = await asyncio.wait(
+                tarefas, timeout=self.prazo_carga)
+            for tarefa in pendentes:
+                tarefa.cancel()
+            if pendentes:
+                await asyncio.gather(*pendentes, return_exceptions=True)
+        except asyncio.CancelledError:
+            for tarefa in tarefas:
+                tarefa.cancel()
+            raise
+        finally:
+            if sessao_propria:
+                await sessao.close()
+
+        dados_completos = [
+            tarefa.result() for tarefa in concluidas
+            if tarefa.exception() is None and not tarefa.result().empty
+        ]
+        if not dados_completos:
+            return pd.DataFrame()
+
+        return pd.concat(dados_completos, ignore_index=True)
+
+    async def contar_leads(self, aba_selecionada="Setembro"):
+        """Atalho para serviços externos: total de leads por vendedor na aba"""
+        df = await self.carregar_todos_dados(aba_selecionada)
+        if df.empty:
+            return {}
+        return df.groupby('Vendedor').size().to_dict()
@@ -1,13 +1,18 @@
 import streamlit as st
-import pandas as pd
+import os
 from datetime import datetime, timedelta
-import plotly.express as px
 
 # Importa os módulos personalizados
-from data_loader import GoogleSheetsLoader, carregar_dados_demo
+from data_loader import GoogleSheetsLoader, carregar_dados_demo, limpar_cache_fontes
+from config_vendedores import RegistroVendedores
+from armazem import obter_armazem_configurado
+from coortes import AnaliseCoortes
+from historico_status import obter_historico_configurado
 from data_processor import DataProcessor
 from visualizations import DashboardCharts
-from utils import formatar_numero, formatar_percentual, obter_status_disponiveis
+from utils import (formatar_numero, formatar_percentual, obter_status_disponiveis,
+                   configurar_sinonimos_status, gerar_fingerprint)
+from exportacao import ExportadorDados, FORMATOS_EXPORTACAO, TAMANHO_MAXIMO_DOWNLOAD
 
 # Configuração da página
 st.set_page_config(
@@ -39,21 +44,104 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-@st.cache_data(ttl=300)
+@st.cache_resource
+def obter_registro():
+    """Registro de vendedores compartilhado, recarregado quando o arquivo muda"""
+    return RegistroVendedores()
+
+
+@st.cache_resource
+def obter_armazem():
+    """Armazém local de leads (None quando DASH_SHEETS_ARMAZEM não está definido)"""
+    return obter_armazem_configurado()
+
+
+@st.cache_resource
+def obter_historico():
+    """Log de mudanças de status entre cargas, compartilhado pelo processo"""
+    return obter_historico_configurado()
+
+
 def carregar_dados(aba_selecionada="Setembro"):
-    """Carrega os dados com cache"""
+    """Carrega os dados da aba sem desenhar nada na página
+
+    Retorna (df, origem, avisos), com origem "planilhas", "armazem" ou "demo" e
+    avisos = [(nivel, mensagem)] para a página mostrar.
+    """
+    avisos = []
     try:
-        loader = GoogleSheetsLoader()
+        armazem = obter_armazem()
+        loader = GoogleSheetsLoader(
+            obter_registro(), armazem, historico=obter_historico(), interface=False)
         df = loader.carregar_todos_dados(aba_selecionada)
-        if df.empty:
-            st.warning(
-                "⚠️ Não foi possível carregar dados do Google Sheets. Usando dados de demonstração.")
-            df = carregar_dados_demo()
-        return df
+        avisos = loader.avisos
+        if not df.empty:
+            return df, "planilhas", avisos
+
+        # Sem planilhas acessíveis, usa a última carga gravada localmente de cada
+        # vendedor: as mesmas linhas que as planilhas mostraram (não todos os anos)
+        if df.empty and armazem is not None:
+            df = armazem.carregar_leads(aba_selecionada, ultima_carga=True)
+            if not df.empty:
+                avisos.append((
+                    "info",
+                    f"💾 Usando {len(df)} registros do armazém local para a aba '{aba_selecionada}'."))
+                return df, "armazem", avisos
+
+        avisos.append((
+            "warning",
+            "⚠️ Não foi possível carregar dados do Google Sheets. Usando dados de demonstração."))
+        return carregar_dados_demo(aba_selecionada=aba_selecionada), "demo", avisos
     except Exception as e:
-        st.error(f"❌ Erro ao carregar dados: {str(e)}")
-        st.info("🔄 Carregando dados de demonstração...")
-        return carregar_dados_demo()
+        avisos.append(("error", f"❌ Erro ao carregar dados: {str(e)}"))
+        avisos.append(("info", "🔄 Carregando dados de demonstração..."))
+        return carregar_dados_demo(aba_selecionada=aba_selecionada), "demo", avisos
+
+
+def listar_status_unicos(df_raw):
+    """Lista os status brutos encontrados na aba (usado apenas no modo debug)"""
+    if df_raw.empty or 'Status' not in df_raw.columns:
+        return []
+
+    # Corrige o erro de comparação de tipos
+    status_unicos = df_raw['Status'].dropna().astype(str).unique()
+    return sorted([s for s in status_unicos if s != 'nan'])
+
+
+@st.cache_resource(ttl=300)
+def obter_processor(aba_selecionada="Setembro", versao_registro=None):
+    """Carrega e processa a aba uma única vez, compartilhando entre as sessões
+
+    A versão do registro invalida o resultado quando a configuração muda.
+    Retorna (processor, df_raw, avisos); nada é desenhado aqui, então o
+    Streamlit não tem elementos a repetir a cada rerun.
+    """
+    df, origem, avisos = carregar_dados(aba_selecionada)
+    processor = DataProcessor(df)
+
+    # Só as fontes (vendedor, aba) que mudaram são recontadas nas coortes;
+    # dados de demonstração não entram nas coortes
+    if origem != "demo":
+        obter_coortes().atualizar(processor.df)
+    return processor, df, avisos
+
+
+@st.cache_resource
+def obter_coortes():
+    """Matrizes de coorte acumuladas pelo processo, atualizadas a cada carga"""
+    return AnaliseCoortes()
+
+
+@st.cache_resource
+def obter_exportador():
+    """Exportador compartilhado entre as sessões, com cache de arquivos em disco"""
+    return ExportadorDados()
+
+
+@st.cache_resource
+def obter_charts():
+    """Gráficos compartilhados entre as sessões, com cache de figuras"""
+    return DashboardCharts()
 
 
 def main():
@@ -72,8 +160,10 @@ def main():
         st.session_state.debug_mode = debug_mode
 
     # Filtro de Aba
-    loader = GoogleSheetsLoader()
-    abas_disponiveis = loader.obter_abas_disponiveis()
+    registro = obter_registro()
+    registro.recarregar_se_alterado()
+    configurar_sinonimos_status(registro.sinonimos_status)
+    abas_disponiveis = registro.obter_abas()
 
     aba_selecionada = st.sidebar.selectbox(
         "📋 Selecione a Aba:",
@@ -81,43 +171,34 @@ def main():
         index=0  # Setembro como padrão
     )
 
-    # Carrega os dados baseado na aba selecionada
+    # Carrega e processa os dados (reaproveitados entre reruns enquanto a aba não muda)
     with st.spinner(f"🔄 Carregando dados da aba '{aba_selecionada}'..."):
-        df_raw = carregar_dados(aba_selecionada)
+        processor, df_raw, avisos = obter_processor(aba_selecionada, registro.versao)
+
+    for nivel, mensagem in avisos:
+        getattr(st, nivel)(mensagem)
 
-    if df_raw.empty:
+    if processor.df.empty:
         st.error("❌ Não foi possível carregar os dados.")
         st.info(
             "💡 Verifique se as planilhas do Google Sheets estão públicas e acessíveis.")
         return
 
-    # Debug: mostra informações dos dados carregados
+    # Debug: mostra informações dos dados carregados (sob demanda)
     if debug_mode:
         st.subheader("🐛 Informações de Debug")
-        with st.expander("Ver dados brutos carregados", expanded=False):
-            st.write("Shape dos dados:", df_raw.shape)
-            st.write("Colunas:", list(df_raw.columns))
-            st.write("Primeiras 5 linhas:")
-            st.dataframe(df_raw.head())
-
-            # Corrige o erro de comparação de tipos
-            try:
-                status_unicos = df_raw['Status'].dropna().astype(str).unique()
-                status_unicos_ordenados = sorted(
-                    [s for s in status_unicos if s != 'nan'])
-                st.write("Status únicos encontrados:")
-                st.write(status_unicos_ordenados)
-            except Exception as e:
-                st.write(f"Erro ao processar status únicos: {e}")
-                st.write("Status únicos (sem ordenação):")
-                st.write(list(df_raw['Status'].dropna().unique()))
+        if st.toggle("Ver dados brutos carregados", value=False):
+            with st.container(border=True):
+                st.write("Shape dos dados:", df_raw.shape)
+                st.write("Colunas:", list(df_raw.columns))
+                st.write("Primeiras 5 linhas:")
+                st.dataframe(df_raw.head())
 
-    # Processa os dados
-    processor = DataProcessor(df_raw)
-    charts = DashboardCharts()
+                st.write("Status únicos encontrados:")
+                st.write(listar_status_unicos(df_raw))
 
     # Filtro de vendedor
-    vendedores_disponiveis = sorted(df_raw['Vendedor'].unique())
+    vendedores_disponiveis = sorted(processor.df['Vendedor'].unique())
     vendedores_selecionados = st.sidebar.multiselect(
         "👥 Selecione os Vendedores:",
         options=vendedores_disponiveis,
@@ -129,8 +210,8 @@ def main():
 
     # Data mínima e máxima dos dados
     try:
-        data_min = pd.to_datetime(df_raw['Data'], errors='coerce').min().date()
-        data_max = pd.to_datetime(df_raw['Data'], errors='coerce').max().date()
+        data_min = processor.df['Data'].min().date()
+        data_max = processor.df['Data'].max().date()
     except:
         data_min = datetime.now().date() - timedelta(days=90)
         data_max = datetime.now().date()
@@ -154,36 +235,62 @@ def main():
 
     # Botão para atualizar dados
     if st.sidebar.button("🔄 Atualizar Dados"):
-        st.cache_data.clear()
+        obter_processor.clear()
+        limpar_cache_fontes()
         st.rerun()
 
     # Informações sobre os dados carregados
     st.sidebar.markdown("---")
     st.sidebar.subheader("ℹ️ Informações")
     st.sidebar.info(f"📋 Aba: {aba_selecionada}")
-    st.sidebar.info(f"📊 Total de registros: {len(df_raw)}")
+    st.sidebar.info(f"📊 Total de registros: {len(processor.df)}")
     st.sidebar.info(f"👥 Vendedores: {len(vendedores_disponiveis)}")
 
-    # Expander com informações sobre status
-    with st.sidebar.expander("📋 Status Organizados", expanded=False):
-        status_info = obter_status_disponiveis()
-        for categoria, status_lista in status_info.items():
-            st.markdown(f"**{categoria}:**")
-            for status in status_lista:
-                st.markdown(f"• {status}")
+    # Informações sobre status, exibidas apenas sob demanda
+    if st.sidebar.toggle("📋 Status Organizados", value=False):
+        with st.sidebar.container(border=True):
+            status_info = obter_status_disponiveis()
+            for categoria, status_lista in status_info.items():
+                st.markdown(f"**{categoria}:**")
+                for status in status_lista:
+                    st.markdown(f"• {status}")
+
+    filtros = (tuple(vendedores_selecionados), data_inicio, data_fim)
+
+    # Cada seção é um fragmento: interações internas reexecutam só a seção
+    renderizar_kpis_e_graficos(processor, filtros)
+    renderizar_tabela(processor, filtros, aba_selecionada)
+
+
+def obter_dados_filtrados(processor, filtros):
+    """Aplica os filtros (o processor memoriza o resultado por combinação de filtros)"""
+    vendedores_selecionados, data_inicio, data_fim = filtros
+    return processor.filtrar_dados(
+        list(vendedores_selecionados), data_inicio, data_fim)
+
+
+@st.fragment
+def renderizar_kpis_e_graficos(processor, filtros):
+    """Seção de KPIs e gráficos"""
+    charts = obter_charts()
 
     # Aplica filtros
-    df_filtrado = processor.filtrar_dados(
-        vendedores_selecionados, data_inicio, data_fim)
+    df_filtrado = obter_dados_filtrados(processor, filtros)
 
     if df_filtrado.empty:
         st.warning("⚠️ Nenhum dado encontrado com os filtros aplicados.")
         return
 
-    # Calcula KPIs
-    kpis = processor.calcular_kpis(df_filtrado)
-    df_vendedor = processor.obter_dados_por_vendedor(df_filtrado)
-    df_tempo = processor.obter_leads_por_tempo(df_filtrado)
+    # Calcula KPIs (combinações de filtro repetidas vêm do memo do processor)
+    kpis = processor.obter_kpis(*filtros)
+    df_vendedor = processor.obter_resumo_vendedores(*filtros)
+    nivel_tempo, df_tempo = processor.obter_serie_tempo(*filtros)
+
+    if st.session_state.get('debug_mode', False):
+        memo = processor.estatisticas_memo()
+        st.caption(
+            f"🐛 Memo de filtros: {memo['acertos']} acertos, {memo['falhas']} falhas, "
+            f"{memo['entradas']} entradas, {memo['bytes'] / 2**20:.1f} MiB")
 
     # Seção de KPIs principais
     st.header("📈 KPIs Principais")
@@ -215,33 +322,34 @@ def main():
             value=formatar_numero(kpis['leads_perdidos'])
         )
 
-    # Expander para KPIs adicionais
-    with st.expander("📋 Ver KPIs Detalhados Adicionais", expanded=False):
-        col5, col6, col7, col8 = st.columns(4)
-
-        with col5:
-            st.metric(
-                label="📝 Leads com Nome",
-                value=formatar_numero(kpis['leads_com_nome'])
-            )
-
-        with col6:
-            st.metric(
-                label="📞 Leads com Telefone",
-                value=formatar_numero(kpis['leads_com_telefone'])
-            )
-
-        with col7:
-            st.metric(
-                label="🏷️ Leads com Status",
-                value=formatar_numero(kpis['leads_com_status'])
-            )
-
-        with col8:
-            st.metric(
-                label="⏳ Em Progresso",
-                value=formatar_numero(kpis['funil_progresso'])
-            )
+    # KPIs adicionais, exibidos apenas sob demanda
+    if st.toggle("📋 Ver KPIs Detalhados Adicionais", value=False):
+        with st.container(border=True):
+            col5, col6, col7, col8 = st.columns(4)
+
+            with col5:
+                st.metric(
+                    label="📝 Leads com Nome",
+                    value=formatar_numero(kpis['leads_com_nome'])
+                )
+
+            with col6:
+                st.metric(
+                    label="📞 Leads com Telefone",
+                    value=formatar_numero(kpis['leads_com_telefone'])
+                )
+
+            with col7:
+                st.metric(
+                    label="🏷️ Leads com Status",
+                    value=formatar_numero(kpis['leads_com_status'])
+                )
+
+            with col8:
+                st.metric(
+                    label="⏳ Em Progresso",
+                    value=formatar_numero(kpis['funil_progresso'])
+                )
 
     st.markdown("---")
 
@@ -287,89 +395,171 @@ def main():
 
     # Gráfico de leads ao longo do tempo
     st.subheader("Leads Criados ao Longo do Tempo")
-    fig_tempo = charts.criar_leads_tempo(df_tempo)
+    fig_tempo = charts.criar_leads_tempo(df_tempo, nivel_tempo)
     st.plotly_chart(fig_tempo, use_container_width=True)
 
+
+@st.fragment
+def renderizar_tabela(processor, filtros, aba_selecionada):
+    """Seção da tabela de dados detalhados e exportação"""
+    df_filtrado = obter_dados_filtrados(processor, filtros)
+    if df_filtrado.empty:
+        return
+
+    # Coortes de conversão, montadas apenas sob demanda
+    if st.toggle("📅 Ver Conversão por Coorte Semanal", value=False):
+        with st.container(border=True):
+            vendedores_selecionados, data_inicio, data_fim = filtros
+            matriz_coortes = obter_coortes().obter_matriz_conversao(
+                aba_selecionada, list(vendedores_selecionados), data_inicio, data_fim)
+            if matriz_coortes.empty:
+                st.info("ℹ️ Sem coortes para esta aba e período (dados de demonstração não entram).")
+            else:
+                fig_coortes = obter_charts().criar_heatmap_coortes(matriz_coortes)
+                st.plotly_chart(fig_coortes, use_container_width=True)
+
+    # Histórico de mudanças de status, montado apenas sob demanda
+    if st.toggle("🔁 Ver Mudanças de Status Detectadas", value=False):
+        with st.container(border=True):
+            historico = obter_historico()
+            vendedores_selecionados, data_inicio, data_fim = filtros
+            eventos = historico.obter_eventos(
+                list(vendedores_selecionados), aba_selecionada, data_inicio, data_fim)
+            if eventos.empty:
+                st.info(
+                    "ℹ️ Nenhuma mudança de status detectada nesta aba e período.")
+            else:
+                tempos = historico.calcular_tempo_ate_fechamento(
+                    list(vendedores_selecionados), aba_selecionada, data_inicio, data_fim)
+                if not tempos.empty:
+                    st.metric("⏱️ Mediana de dias até o fechamento",
+                              f"{tempos['Dias_Ate_Fechamento'].median():.0f}")
+                st.dataframe(eventos.drop(columns='Chave'),
+                             use_container_width=True)
+
     # Tabela de dados detalhados
     st.markdown("---")
     st.header("📋 Dados Detalhados")
 
-    # Expander para dados detalhados
-    with st.expander("🔍 Ver Tabela de Dados Detalhados", expanded=False):
-        # Opções de visualização da tabela
-        col1, col2, col3 = st.columns(3)
-
-        with col1:
-            colunas_disponiveis = ['Data_Formatada', 'Vendedor',
-                                   'Aluno', 'Telefone', 'Status', 'Status_Categoria', 'Aba']
-            mostrar_colunas = st.multiselect(
-                "Selecione as colunas:",
-                options=colunas_disponiveis,
-                default=['Data_Formatada', 'Vendedor', 'Aluno', 'Status']
-            )
-
-        with col2:
-            linhas_por_pagina = st.selectbox(
-                "Linhas por página:",
-                options=[10, 25, 50, 100],
-                index=1
-            )
-
-        with col3:
-            colunas_ordenacao = ['Data_Formatada',
-                                 'Vendedor', 'Aluno', 'Status']
-            ordenar_por = st.selectbox(
-                "Ordenar por:",
-                options=colunas_ordenacao,
-                index=0
-            )
-
-        # Exibe a tabela
-        if mostrar_colunas:
-            try:
-                df_exibicao = df_filtrado[mostrar_colunas].copy()
-
-                if ordenar_por in df_exibicao.columns:
-                    df_exibicao = df_exibicao.sort_values(
-                        ordenar_por, ascending=False)
-
-                # Paginação
-                total_linhas = len(df_exibicao)
-                total_paginas = max(1, (total_linhas - 1) //
-                                    linhas_por_pagina + 1)
-
-                if total_paginas > 1:
-                    pagina = st.number_input(
-                        f"Página (1 a {total_paginas}):",
-                        min_value=1,
-                        max_value=total_paginas,
-                        value=1
+    # Tabela de dados detalhados, montada apenas sob demanda
+    if st.toggle("🔍 Ver Tabela de Dados Detalhados", value=False):
+        with st.container(border=True):
+            # Opções de visualização da tabela
+            col1, col2, col3 = st.columns(3)
+
+            with col1:
+                colunas_disponiveis = ['Data', 'Vendedor',
+                                       'Aluno', 'Telefone', 'Status', 'Status_Categoria', 'Aba']
+                mostrar_colunas = st.multiselect(
+                    "Selecione as colunas:",
+                    options=colunas_disponiveis,
+                    default=['Data', 'Vendedor', 'Aluno', 'Status']
+                )
+
+            with col2:
+                linhas_por_pagina = st.selectbox(
+                    "Linhas por página:",
+                    options=[10, 25, 50, 100],
+                    index=1
+                )
+
+            with col3:
+                colunas_ordenacao = ['Data',
+                                     'Vendedor', 'Aluno', 'Status']
+                ordenar_por = st.selectbox(
+                    "Ordenar por:",
+                    options=colunas_ordenacao,
+                    index=0
+                )
+
+            # Exibe a tabela
+            if mostrar_colunas:
+                try:
+                    df_exibicao = df_filtrado[mostrar_colunas].copy()
+
+                    if ordenar_por in df_exibicao.columns:
+                        df_exibicao = df_exibicao.sort_values(
+                            ordenar_por, ascending=False)
+
+                    # Paginação
+                    total_linhas = len(df_exibicao)
+                    total_paginas = max(1, (total_linhas - 1) //
+                                        linhas_por_pagina + 1)
+
+                    if total_paginas > 1:
+                        pagina = st.number_input(
+                            f"Página (1 a {total_paginas}):",
+                            min_value=1,
+                            max_value=total_paginas,
+                            value=1
+                        )
+
+                        inicio = (pagina - 1) * linhas_por_pagina
+                        fim = inicio + linhas_por_pagina
+                        df_exibicao = df_exibicao.iloc[inicio:fim]
+
+                    # Formatação da data feita na exibição, sem strftime por linha
+                    st.dataframe(
+                        df_exibicao,
+                        use_container_width=True,
+                        column_config={
+                            'Data': st.column_config.DateColumn(format="DD/MM/YYYY")
+                        }
                     )
+                    st.info(
+                        f"📊 Mostrando {len(df_exibicao)} de {total_linhas} registros")
 
-                    inicio = (pagina - 1) * linhas_por_pagina
-                    fim = inicio + linhas_por_pagina
-                    df_exibicao = df_exibicao.iloc[inicio:fim]
+                except Exception as e:
+                    st.error(f"❌ Erro ao exibir tabela: {str(e)}")
 
-                st.dataframe(df_exibicao, use_container_width=True)
-                st.info(
-                    f"📊 Mostrando {len(df_exibicao)} de {total_linhas} registros")
-
-            except Exception as e:
-                st.error(f"❌ Erro ao exibir tabela: {str(e)}")
-
-        # Botão para download dos dados
-        st.markdown("---")
-        if st.button("📥 Download dos Dados (CSV)"):
-            try:
-                csv = df_filtrado.to_csv(index=False)
-                st.download_button(
-                    label="Baixar CSV",
-                    data=csv,
-                    file_name=f"dados_vendas_{aba_selecionada}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv"
+            # Exportação dos dados filtrados
+            st.markdown("---")
+            col_formato, col_preparar = st.columns(2)
+
+            with col_formato:
+                formato_exportacao = st.selectbox(
+                    "Formato de exportação:",
+                    options=list(FORMATOS_EXPORTACAO.keys()),
+                    index=0
                 )
-            except Exception as e:
-                st.error(f"❌ Erro ao gerar CSV: {str(e)}")
+
+            # Chave da exportação: versão dos dados + filtros + formato (sem hashear o DataFrame)
+            fingerprint = gerar_fingerprint(
+                processor.versao, filtros, aba_selecionada, formato_exportacao)
+
+            with col_preparar:
+                # O arquivo só é gerado quando pedido explicitamente
+                if st.button("📦 Preparar arquivo para download"):
+                    try:
+                        caminho_exportacao = obter_exportador().exportar(
+                            df_filtrado, formato_exportacao, fingerprint)
+                        if os.path.getsize(caminho_exportacao) > TAMANHO_MAXIMO_DOWNLOAD:
+                            st.error(
+                                f"❌ Arquivo acima de {TAMANHO_MAXIMO_DOWNLOAD // 2**20} MB: "
+                                "aplique mais filtros ou use CSV (gzip)/Parquet.")
+                        else:
+                            st.session_state['_exportacao'] = (
+                                fingerprint, caminho_exportacao)
+                    except Exception as e:
+                        st.error(f"❌ Erro ao gerar arquivo de exportação: {str(e)}")
+
+            # O botão de download (que carrega o arquivo em memória) só existe até
+            # o download: depois dele, ou se os filtros mudarem, é descartado
+            exportacao = st.session_state.get('_exportacao')
+            if exportacao is not None and exportacao[0] != fingerprint:
+                st.session_state.pop('_exportacao', None)
+                exportacao = None
+
+            if exportacao is not None and os.path.exists(exportacao[1]):
+                formato_info = FORMATOS_EXPORTACAO[formato_exportacao]
+                with open(exportacao[1], 'rb') as arquivo:
+                    st.download_button(
+                        label=f"📥 Download dos Dados ({formato_exportacao})",
+                        data=arquivo,
+                        file_name=f"dados_vendas_{aba_selecionada}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato_info['extensao']}",
+                        mime=formato_info['mime'],
+                        on_click=lambda: st.session_state.pop('_exportacao', None)
+                    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,161 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+from armazem import ArmazemLeads, VARIAVEL_ARMAZEM
+from config_vendedores import RegistroVendedores
+from data_processor import DataProcessor
+from leitura_planilhas import PRAZO_CARGA
+from loader_async import CarregadorSheetsAssincrono, MAX_CONCORRENCIA
+from utils import configurar_sinonimos_status
+
+
+FORMATOS_SAIDA = ("json", "csv", "parquet")
+
+
+def _valor_json(valor):
+    """Converte escalares NumPy/pandas em tipos nativos para o JSON"""
+    if hasattr(valor, 'item'):
+        return valor.item()
+    return valor
+
+
+def carregar_aba(aba, carregador, armazem=None):
+    """Carrega uma aba das planilhas, gravando no armazém local se configurado"""
+    df = asyncio.run(carregador.carregar_todos_dados(aba))
+    if not df.empty and armazem is not None:
+        armazem.salvar_leads(df)
+    return df
+
+
+def gerar_relatorio_aba(df):
+    """Calcula os KPIs e as métricas por vendedor de uma aba"""
+    processor = DataProcessor(df)
+    kpis = processor.calcular_kpis(processor.df)
+    por_vendedor = processor.obter_dados_por_vendedor(processor.df)
+    return kpis, por_vendedor
+
+
+def gerar_relatorio_armazem(aba, armazem):
+    """Calcula os mesmos KPIs direto em SQL no armazém, sem carregar as linhas
+
+    Usa a última carga de cada vendedor: as mesmas linhas do relatório online.
+    """
+    kpis = armazem.calcular_kpis(aba, ultima_carga=True)
+    por_vendedor = armazem.obter_dados_por_vendedor(aba, ultima_carga=True)
+    return kpis, por_vendedor
+
+
+def escrever_saida(relatorios, formato, saida):
+    """Grava o relatório: um JSON único, ou duas tabelas (KPIs e vendedores) em CSV/Parquet"""
+    if formato == "json":
+        conteudo = {
+            aba: {
+                'origem': relatorio['origem'],
+                'kpis': {chave: _valor_json(valor) for chave, valor in relatorio['kpis'].items()},
+                'por_vendedor': [
+                    {chave: _valor_json(valor) for chave, valor in linha.items()}
+                    for linha in relatorio['por_vendedor'].to_dict('records')
+                ]
+            }
+            for aba, relatorio in relatorios.items()
+        }
+        if saida == '-':
+            json.dump(conteudo, sys.stdout, ensure_ascii=False, indent=2)
+            sys.stdout.write('\n')
+        else:
+            with open(saida, 'w', encoding='utf-8') as arquivo:
+                json.dump(conteudo, arquivo, ensure_ascii=False, indent=2)
+        return [saida]
+
+    df_kpis = pd.DataFrame([
+        {'Aba': aba, 'Origem': relatorio['origem'], **relatorio['kpis']}
+        for aba, relatorio in relatorios.items()
+    ])
+    tabelas_vendedores = [
+        relatorio['por_vendedor'].assign(Aba=aba)
+        for aba, relatorio in relatorios.items() if not relatorio['por_vendedor'].empty
+    ]
+    df_vendedores = (pd.concat(tabelas_vendedores, ignore_index=True)
+                     if tabelas_vendedores else pd.DataFrame())
+
+    base, _ = os.path.splitext(saida)
+    caminho_kpis = f"{base}_kpis.{formato}"
+    caminho_vendedores = f"{base}_vendedores.{formato}"
+
+    if formato == "csv":
+        df_kpis.to_csv(caminho_kpis, index=False)
+        df_vendedores.to_csv(caminho_vendedores, index=False)
+    else:
+        df_kpis.to_parquet(caminho_kpis, index=False)
+        df_vendedores.to_parquet(caminho_vendedores, index=False)
+
+    return [caminho_kpis, caminho_vendedores]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Gera o relatório de KPIs das planilhas sem abrir o dashboard")
+    parser.add_argument('--abas', nargs='+', default=None,
+                        help="Abas a processar (padrão: todas as abas do registro)")
+    parser.add_argument('--formato', choices=FORMATOS_SAIDA, default="json")
+    parser.add_argument('--saida', default='-',
+                        help="Arquivo de saída ('-' = stdout, apenas para JSON)")
+    parser.add_argument('--registro', default=None,
+                        help="vendedores.json a usar (ex.: o do stub local)")
+    parser.add_argument('--armazem', default=os.environ.get(VARIAVEL_ARMAZEM),
+                        help="Banco SQLite usado como cache em disco")
+    parser.add_argument('--offline', action='store_true',
+                        help="Não acessa as planilhas; lê apenas o armazém local")
+    parser.add_argument('--concorrencia', type=int, default=MAX_CONCORRENCIA)
+    parser.add_argument('--prazo', type=float, default=PRAZO_CARGA,
+                        help="Prazo máximo (s) para carregar cada aba")
+    parser.add_argument('--arrow', action='store_true', default=None,
+                        help="Usa o modo Arrow (leitor CSV do pyarrow e colunas ArrowDtype)")
+    args = parser.parse_args(argv)
+
+    if args.formato != "json" and args.saida == '-':
+        parser.error("CSV e Parquet precisam de --saida")
+    if args.offline and not args.armazem:
+        parser.error("O modo offline precisa de um armazém local (--armazem)")
+
+    registro = RegistroVendedores(args.registro)
+    # Mesmos sinônimos de status do app: os KPIs classificam os status iguais
+    configurar_sinonimos_status(registro.sinonimos_status)
+    armazem = ArmazemLeads(args.armazem) if args.armazem else None
+    carregador = CarregadorSheetsAssincrono(
+        registro, max_concorrencia=args.concorrencia, prazo_carga=args.prazo,
+        usar_arrow=args.arrow)
+
+    relatorios = {}
+    for aba in args.abas or registro.obter_abas():
+        inicio = time.monotonic()
+        df = pd.DataFrame() if args.offline else carregar_aba(aba, carregador, armazem)
+
+        if df.empty and armazem is not None:
+            # Offline ou sem planilhas acessíveis: agrega no próprio armazém
+            origem = "armazem"
+            kpis, por_vendedor = gerar_relatorio_armazem(aba, armazem)
+        else:
+            origem = "planilhas"
+            kpis, por_vendedor = gerar_relatorio_aba(df)
+        relatorios[aba] = {'origem': origem, 'kpis': kpis, 'por_vendedor': por_vendedor}
+
+        # Uma aba por vez: os dados brutos são liberados antes da próxima
+        del df
+        print(f"{aba}: {kpis['total_leads']} leads ({origem}, "
+              f"{time.monotonic() - inicio:.1f}s)", file=sys.stderr)
+
+    for caminho in escrever_saida(relatorios, args.formato, args.saida):
+        if caminho != '-':
+            print(f"Relatório gravado em {caminho}", file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
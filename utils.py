@@ -1,10 +1,90 @@
 import pandas as pd
-from datetime import datetime, timedelta
-import streamlit as st
+from datetime import datetime
 import re
+import hashlib
+import difflib
+import unicodedata
+from functools import lru_cache
+import numpy as np
 
 
-def processar_data_inteligente(data_str):
+# Meses pelo nome usado nas abas (sem acentos, minúsculas)
+MESES_ABAS = {
+    'janeiro': 1, 'fevereiro': 2, 'marco': 3, 'abril': 4, 'maio': 5, 'junho': 6,
+    'julho': 7, 'agosto': 8, 'setembro': 9, 'outubro': 10, 'novembro': 11, 'dezembro': 12
+}
+
+# Distância máxima (em meses) entre a data de um lead e o mês da aba antes de ser suspeita
+TOLERANCIA_MESES_ABA = 1
+
+
+def _referencia_datas(referencia=None):
+    """Data de referência das inferências (hoje, se não informada)"""
+    return pd.Timestamp(referencia if referencia is not None else datetime.now()).normalize()
+
+
+def interpretar_aba(aba, referencia=None):
+    """Retorna (ano, mes) do período da aba, ou (None, None) se o nome não tem mês
+
+    Usa o ano escrito no nome ("Setembro 2024"); sem ele, o ano mais recente em
+    que o mês da aba não fica no futuro (uma aba "Dezembro" lida em janeiro é do
+    ano anterior).
+    """
+    if not aba:
+        return None, None
+
+    texto = unicodedata.normalize('NFKD', str(aba))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+    mes = next((numero for nome, numero in MESES_ABAS.items() if nome in texto), None)
+    if mes is None:
+        return None, None
+
+    ano_escrito = re.search(r'(?:19|20)\d{2}', texto)
+    if ano_escrito:
+        return int(ano_escrito.group()), mes
+
+    referencia = _referencia_datas(referencia)
+    return (referencia.year if mes <= referencia.month else referencia.year - 1), mes
+
+
+def inferir_anos(meses, aba=None, referencia=None):
+    """Infere o ano de datas dd/mm de uma planilha a partir dos meses, em ordem das linhas
+
+    Com o mês da aba, cada data fica no ano mais próximo dele (dezembro numa aba de
+    janeiro é do ano anterior). Sem mês na aba, a ordem das linhas indica as viradas
+    de ano (12 -> 01) e a última linha fica no ano mais recente que não é futuro.
+    """
+    meses = np.asarray(meses, dtype=np.int64)
+    if len(meses) == 0:
+        return meses
+
+    referencia = _referencia_datas(referencia)
+    ano_aba, mes_aba = interpretar_aba(aba, referencia)
+
+    if mes_aba is not None:
+        diferenca = meses - mes_aba
+        return ano_aba - (diferenca > 6).astype(np.int64) + (diferenca < -6).astype(np.int64)
+
+    viradas = np.concatenate(([0], np.cumsum(np.diff(meses) < -6)))
+    ano_final = referencia.year if meses[-1] <= referencia.month else referencia.year - 1
+    return ano_final - (viradas[-1] - viradas)
+
+
+def marcar_datas_suspeitas(datas, aba=None, referencia=None):
+    """Marca datas no futuro ou longe do período da aba (ex.: ano digitado errado)"""
+    referencia = _referencia_datas(referencia)
+    suspeitas = datas > referencia + pd.Timedelta(days=1)
+
+    ano_aba, mes_aba = interpretar_aba(aba, referencia)
+    if mes_aba is not None:
+        distancia = (datas.dt.year * 12 + datas.dt.month) - (ano_aba * 12 + mes_aba)
+        suspeitas |= distancia.abs() > TOLERANCIA_MESES_ABA
+
+    return suspeitas.fillna(False).astype(bool)
+
+
+def processar_data_inteligente(data_str, aba=None, referencia=None):
     """Processa datas em diferentes formatos de forma inteligente"""
     if pd.isna(data_str):
         return None
@@ -20,9 +100,6 @@ def processar_data_inteligente(data_str):
     if not data_str or data_str == 'nan':
         return None
 
-    # Ano atual para completar datas incompletas
-    ano_atual = datetime.now().year
-
     try:
         # Padrão 1: dd/mm/yyyy (completo)
         if re.match(r'^\d{1,2}/\d{1,2}/\d{4}$', data_str):
@@ -32,10 +109,10 @@ def processar_data_inteligente(data_str):
         elif re.match(r'^\d{1,2}/\d{1,2}/\d{2}$', data_str):
             return pd.to_datetime(data_str, format='%d/%m/%y', errors='coerce')
 
-        # Padrão 3: dd/mm (sem ano - assume ano atual)
+        # Padrão 3: dd/mm (sem ano - ano inferido pela aba)
         elif re.match(r'^\d{1,2}/\d{1,2}$', data_str):
-            data_str_completa = f"{data_str}/{ano_atual}"
-            return pd.to_datetime(data_str_completa, format='%d/%m/%Y', errors='coerce')
+            ano = inferir_anos([int(data_str.split('/')[1])], aba, referencia)[0]
+            return pd.to_datetime(f"{data_str}/{ano}", format='%d/%m/%Y', errors='coerce')
 
         # Padrão 4: Tenta conversão automática do pandas
         else:
@@ -45,32 +122,170 @@ def processar_data_inteligente(data_str):
         return None
 
 
+def _como_texto(serie):
+    """Converte a coluna em texto sem passar por objetos Python quando ela é Arrow"""
+    if isinstance(serie.dtype, pd.ArrowDtype):
+        import pyarrow as pa
+        return serie.astype(pd.ArrowDtype(pa.string()))
+    return serie.astype('string')
+
+
+def processar_datas_serie(serie, aba=None, referencia=None):
+    """Versão vetorizada de processar_data_inteligente para a coluna de uma planilha
+
+    As linhas devem estar na ordem da planilha: ela é usada na inferência do ano.
+    """
+    texto = _como_texto(serie).str.strip().str.replace(r"'$", '', regex=True)
+    datas = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]')
+
+    completo = texto.str.fullmatch(r'\d{1,2}/\d{1,2}/\d{4}').fillna(False).astype(bool)
+    curto = texto.str.fullmatch(r'\d{1,2}/\d{1,2}/\d{2}').fillna(False).astype(bool)
+    sem_ano = texto.str.fullmatch(r'\d{1,2}/\d{1,2}').fillna(False).astype(bool)
+    outros = (texto.notna() & (texto != '') & (texto != 'nan')).fillna(False).astype(bool)
+    outros &= ~(completo | curto | sem_ano)
+
+    if completo.any():
+        datas[completo] = pd.to_datetime(texto[completo], format='%d/%m/%Y', errors='coerce')
+    if curto.any():
+        datas[curto] = pd.to_datetime(texto[curto], format='%d/%m/%y', errors='coerce')
+    if sem_ano.any():
+        # Sem ano: inferido uma vez para a planilha inteira, pela aba e pela ordem das linhas
+        partes = texto[sem_ano].str.split('/', expand=True)
+        dias = pd.to_numeric(partes[0]).to_numpy(dtype=np.int64)
+        meses = pd.to_numeric(partes[1]).to_numpy(dtype=np.int64)
+        datas[sem_ano] = pd.to_datetime(pd.DataFrame({
+            'year': inferir_anos(meses, aba, referencia), 'month': meses, 'day': dias
+        }, index=partes.index), errors='coerce')
+    if outros.any():
+        # Demais formatos: cada valor é interpretado individualmente, como no caminho linha a linha
+        try:
+            datas[outros] = pd.to_datetime(texto[outros], format='mixed', errors='coerce')
+        except (TypeError, ValueError):
+            pass
+
+    return datas
+
+
+def validar_texto_serie(serie):
+    """Versão vetorizada de validar_telefone/validar_nome para uma coluna inteira"""
+    texto = _como_texto(serie).str.strip()
+    return ((texto != '') & (texto != 'nan')).fillna(False).astype(bool)
+
+
+def gerar_fingerprint(*partes):
+    """Gera uma impressão digital estável para DataFrames, Series e valores simples"""
+    hash_final = hashlib.sha1()
+    for parte in partes:
+        if isinstance(parte, (pd.DataFrame, pd.Series)):
+            # Hash vetorizado do conteúdo, sem montar strings linha a linha
+            hash_final.update(str(parte.shape).encode('utf-8'))
+            if len(parte) > 0:
+                hash_final.update(
+                    pd.util.hash_pandas_object(parte, index=False).values.tobytes())
+        else:
+            hash_final.update(repr(parte).encode('utf-8'))
+    return hash_final.hexdigest()
+
+
+# Status conhecidos (já normalizados) e sua categoria
+STATUS_CATEGORIAS = {
+    # Status de leads fechados/convertidos
+    "PAGO": "Fechado",
+    # Status de leads perdidos
+    "LEAD PERDIDO": "Perdido",
+    "NAO RESPONDE": "Perdido",
+    "EM PROGRESSO": "Em Progresso"
+}
+
+# Variações comuns escritas nas planilhas -> status conhecido
+SINONIMOS_STATUS_PADRAO = {
+    "NAO RESPONDEU": "NAO RESPONDE",
+    "SEM RESPOSTA": "NAO RESPONDE",
+    "PERDIDO": "LEAD PERDIDO",
+    "PAGOU": "PAGO",
+    "EM ANDAMENTO": "EM PROGRESSO"
+}
+
+# Semelhança mínima para aceitar um status digitado com erro (ex.: "PAGOO")
+SIMILARIDADE_MINIMA_STATUS = 0.85
+
+_sinonimos_status = dict(SINONIMOS_STATUS_PADRAO)
+
+
+def normalizar_status(status):
+    """Remove acentos, pontuação e espaços extras do status, em maiúsculas"""
+    if pd.isna(status):
+        return ""
+
+    texto = unicodedata.normalize('NFKD', str(status))
+    texto = texto.encode('ascii', errors='ignore').decode('ascii')
+    texto = re.sub(r'[\W_]+', ' ', texto)
+    return texto.strip().upper()
+
+
+def configurar_sinonimos_status(sinonimos):
+    """Acrescenta sinônimos de status aos padrões (chaves e valores são normalizados)"""
+    global _sinonimos_status
+
+    novos_sinonimos = dict(SINONIMOS_STATUS_PADRAO)
+    novos_sinonimos.update({
+        normalizar_status(variacao): normalizar_status(status)
+        for variacao, status in (sinonimos or {}).items()
+    })
+
+    if novos_sinonimos != _sinonimos_status:
+        _sinonimos_status = novos_sinonimos
+        _canonizar_status_normalizado.cache_clear()
+
+
+@lru_cache(maxsize=4096)
+def _canonizar_status_normalizado(status):
+    """Status conhecido equivalente a um status já normalizado (memoizado por valor distinto)"""
+    status = _sinonimos_status.get(status, status)
+    if status in STATUS_CATEGORIAS:
+        return status
+
+    # Aproximação para erros de digitação, só em textos não muito curtos
+    if len(status) >= 4:
+        candidatos = list(STATUS_CATEGORIAS) + list(_sinonimos_status)
+        proximos = difflib.get_close_matches(
+            status, candidatos, n=1, cutoff=SIMILARIDADE_MINIMA_STATUS)
+        if proximos:
+            return _sinonimos_status.get(proximos[0], proximos[0])
+
+    # Status desconhecido: mantém o texto normalizado
+    return status
+
+
+def canonizar_status(status):
+    """Normaliza o status e resolve sinônimos e erros de digitação (ex.: "Quitado" -> "PAGO")"""
+    return _canonizar_status_normalizado(normalizar_status(status))
+
+
+def canonizar_status_serie(serie):
+    """Canoniza uma coluna inteira processando cada status distinto uma única vez"""
+    codigos, unicos = pd.factorize(serie)
+
+    # Código -1 (valor ausente) cai na última posição: texto vazio
+    canonicos = np.array(
+        [canonizar_status(status) for status in unicos] + [""], dtype=object)
+    return pd.Series(canonicos[codigos], index=serie.index)
+
+
 def categorizar_status(status):
     """Categoriza os status em grupos principais"""
-    if pd.isna(status):
-        return "Em Progresso"
+    # Para qualquer outro status, categoriza como "Em Progresso"
+    return STATUS_CATEGORIAS.get(canonizar_status(status), "Em Progresso")
 
-    status = str(status).strip().upper()
 
-    # Status de leads fechados/convertidos
-    status_fechados = ["PAGO"]
+def categorizar_status_serie(serie):
+    """Categoriza uma coluna inteira processando cada status distinto uma única vez"""
+    codigos, unicos = pd.factorize(serie)
 
-    # Status de leads perdidos
-    status_perdidos = [
-        "LEAD PERDIDO",
-        "NÃO RESPONDE"
-    ]
-
-    # Verifica correspondência exata primeiro
-    if status in status_fechados:
-        return "Fechado"
-    elif status in status_perdidos:
-        return "Perdido"
-    elif status == "EM PROGRESSO":
-        return "Em Progresso"
-    else:
-        # Para qualquer outro status, categoriza como "Em Progresso"
-        return "Em Progresso"
+    # Código -1 (valor ausente) cai na última posição: "Em Progresso"
+    categorias = np.array(
+        [categorizar_status(status) for status in unicos] + ["Em Progresso"], dtype=object)
+    return pd.Series(categorias[codigos], index=serie.index)
 
 
 def formatar_numero(numero):
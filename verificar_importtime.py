@@ -0,0 +1,87 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+
+# Dependências que o próprio app sempre usa (o custo delas não entra no orçamento)
+MODULOS_BASE = ("streamlit", "pandas", "numpy")
+
+# Módulos do app importados na inicialização de um worker
+MODULOS_APP = (
+    "utils", "config_vendedores", "agendador", "cache_compartilhado", "leitura_planilhas",
+    "data_loader",
+    "data_processor", "visualizations", "exportacao", "armazem", "coortes",
+    "historico_status"
+)
+
+# Bibliotecas pesadas que só podem ser importadas quando usadas pela primeira vez
+MODULOS_ADIADOS = ("plotly", "requests", "aiohttp", "pyarrow", "redis")
+
+# Orçamento (ms) para importar os módulos do app, além das dependências base
+ORCAMENTO_MS = 300
+
+LINHA_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+def medir_importacao(modulos, preimportar=()):
+    """Roda um Python novo com -X importtime; retorna {modulo: (cumulativo_us, profundidade)}"""
+    codigo = "; ".join(f"import {modulo}" for modulo in (*preimportar, *modulos))
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=diretorio, capture_output=True, text=True, check=True)
+
+    medidas = {}
+    for linha in resultado.stderr.splitlines():
+        encontrado = LINHA_IMPORTTIME.match(linha)
+        if encontrado:
+            _, cumulativo, recuo, modulo = encontrado.groups()
+            medidas[modulo] = (int(cumulativo), len(recuo) // 2)
+    return medidas
+
+
+def verificar(orcamento_ms=ORCAMENTO_MS, repeticoes=3):
+    """Retorna a lista de violações (vazia se a inicialização está dentro do orçamento)"""
+    base = medir_importacao(MODULOS_BASE)
+    violacoes = []
+
+    # Bibliotecas adiadas que aparecem só por causa do app
+    app = medir_importacao(MODULOS_APP, preimportar=MODULOS_BASE)
+    for modulo in app:
+        raiz = modulo.split('.')[0]
+        if raiz in MODULOS_ADIADOS and raiz not in base:
+            violacoes.append(f"{raiz} é importado na inicialização (deveria ser sob demanda)")
+            break
+
+    # Menor tempo entre as repetições, para reduzir o ruído da máquina
+    tempos = []
+    for _ in range(repeticoes):
+        medidas = medir_importacao(MODULOS_APP, preimportar=MODULOS_BASE)
+        tempos.append(sum(cumulativo for modulo, (cumulativo, profundidade) in medidas.items()
+                          if modulo in MODULOS_APP and profundidade == 0) / 1000)
+    tempo_ms = min(tempos)
+
+    print(f"Importação dos módulos do app: {tempo_ms:.1f} ms (orçamento {orcamento_ms} ms)")
+    if tempo_ms > orcamento_ms:
+        violacoes.append(f"importação levou {tempo_ms:.1f} ms, acima de {orcamento_ms} ms")
+
+    return violacoes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Verifica o tempo de importação do app com python -X importtime")
+    parser.add_argument('--orcamento-ms', type=float, default=ORCAMENTO_MS)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    violacoes = verificar(args.orcamento_ms, args.repeticoes)
+    for violacao in violacoes:
+        print(f"❌ {violacao}")
+    sys.exit(1 if violacoes else 0)
+
+
+if __name__ == "__main__":
+    main()
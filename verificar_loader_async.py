@@ -0,0 +1,133 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from agendador import AgendadorRequisicoes
+from cache_compartilhado import CacheMemoria
+from config_vendedores import RegistroVendedores
+from gerador_sintetico import (criar_servidor_stub, escrever_csvs_planilhas,
+                               escrever_registro, gerar_dados_sinteticos)
+from leitura_planilhas import ler_csv, limpar_planilha
+from loader_async import CarregadorSheetsAssincrono
+
+
+def contagens_esperadas(diretorio, sheet_ids, aba):
+    """Leads por vendedor lendo os CSVs direto do disco, com a mesma limpeza"""
+    esperadas = {}
+    for vendedor, sheet_id in sheet_ids.items():
+        caminho = os.path.join(diretorio, f"{sheet_id}__{aba}.csv")
+        if not os.path.exists(caminho):
+            continue
+        with open(caminho, encoding='utf-8') as arquivo:
+            df, _ = limpar_planilha(ler_csv(arquivo.read()), vendedor, aba)
+        if not df.empty:
+            esperadas[vendedor] = len(df)
+    return esperadas
+
+
+def criar_carregador(registro, **opcoes):
+    """Carregador com agendador e cache próprios (nada vem de execuções anteriores)"""
+    return CarregadorSheetsAssincrono(
+        registro, agendador=AgendadorRequisicoes(backoff_base=0.05),
+        cache=CacheMemoria(), usar_arrow=False, **opcoes)
+
+
+def servir(diretorio, **opcoes):
+    """Sobe o stub em uma porta livre numa thread; retorna (servidor, url_base)"""
+    servidor = criar_servidor_stub(diretorio, porta=0, **opcoes)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}"
+
+
+async def verificar_contagens(registro, esperadas, aba):
+    carregador = criar_carregador(registro)
+    contagens = await carregador.contar_leads(aba)
+    if contagens != esperadas:
+        return [f"contagens divergentes: {contagens} != {esperadas}"]
+
+    # Segunda carga: tudo vem do cache, sem tocar no stub
+    inicio = time.perf_counter()
+    if await carregador.contar_leads(aba) != esperadas:
+        return ["a segunda carga (do cache) divergiu da primeira"]
+    print(f"Contagens conferem ({sum(esperadas.values())} leads); "
+          f"carga em cache levou {time.perf_counter() - inicio:.3f}s")
+    return []
+
+
+async def verificar_prazo(registro, aba, prazo):
+    carregador = criar_carregador(registro, prazo_carga=prazo)
+    inicio = time.perf_counter()
+    df = await carregador.carregar_todos_dados(aba)
+    duracao = time.perf_counter() - inicio
+
+    print(f"Stub lento: {len(df)} linhas em {duracao:.2f}s (prazo {prazo}s)")
+    if duracao > prazo + 1:
+        return [f"a carga passou do prazo ({duracao:.2f}s > {prazo}s)"]
+    return []
+
+
+async def verificar_cancelamento(registro, aba):
+    carregador = criar_carregador(registro)
+    tarefa = asyncio.create_task(carregador.carregar_todos_dados(aba))
+    await asyncio.sleep(0.2)
+
+    inicio = time.perf_counter()
+    tarefa.cancel()
+    try:
+        await tarefa
+    except asyncio.CancelledError:
+        duracao = time.perf_counter() - inicio
+        print(f"Cancelamento concluído em {duracao:.3f}s")
+        return [] if duracao < 1 else [f"cancelamento demorou {duracao:.2f}s"]
+    return ["a carga terminou apesar do cancelamento"]
+
+
+def verificar(linhas=5_000, vendedores=4, semente=7, aba="Setembro"):
+    """Retorna a lista de falhas do carregador assíncrono contra o stub local"""
+    df = gerar_dados_sinteticos(n_linhas=linhas, n_vendedores=vendedores,
+                                abas=(aba,), semente=semente)
+    falhas = []
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        sheet_ids = escrever_csvs_planilhas(df, diretorio)
+        esperadas = contagens_esperadas(diretorio, sheet_ids, aba)
+        caminho_registro = os.path.join(diretorio, 'vendedores.json')
+
+        for opcoes, verificacao in (
+                ({}, lambda registro: verificar_contagens(registro, esperadas, aba)),
+                # Um quarto das respostas é 429: as novas tentativas precisam cobrir
+                ({'taxa_429': 0.25}, lambda registro: verificar_contagens(
+                    registro, esperadas, aba)),
+                ({'atraso': 3.0}, lambda registro: verificar_prazo(registro, aba, 1.0)),
+                ({'atraso': 3.0}, lambda registro: verificar_cancelamento(registro, aba))):
+            servidor, url_base = servir(diretorio, **opcoes)
+            try:
+                escrever_registro(caminho_registro, sheet_ids, (aba,), url_base)
+                falhas += asyncio.run(verificacao(RegistroVendedores(caminho_registro)))
+            finally:
+                servidor.shutdown()
+                servidor.server_close()
+
+    return falhas
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Verifica o carregador assíncrono contra o stub local das planilhas")
+    parser.add_argument('--linhas', type=int, default=5_000)
+    parser.add_argument('--vendedores', type=int, default=4)
+    parser.add_argument('--semente', type=int, default=7)
+    args = parser.parse_args()
+
+    falhas = verificar(args.linhas, args.vendedores, args.semente)
+    for falha in falhas:
+        print(f"❌ {falha}")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
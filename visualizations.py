@@ -1,19 +1,62 @@
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import pandas as pd
+import threading
+from collections import OrderedDict
+
+from utils import gerar_fingerprint
+
+# O plotly é importado dentro dos métodos: o custo de importação só é pago
+# quando o primeiro gráfico é construído, não na inicialização do worker
+
+
+# Quantidade máxima de figuras mantidas em cache
+MAX_FIGURAS_CACHE = 64
+
+ROTULOS_NIVEL_TEMPO = {'dia': 'Dia', 'semana': 'Semana', 'mes': 'Mês'}
 
 
 class DashboardCharts:
-    def __init__(self):
+    def __init__(self, max_figuras_cache=MAX_FIGURAS_CACHE):
         self.cores = {
             'Em Progresso': '#3498db',  # Azul
             'Fechado': '#2ecc71',       # Verde
             'Perdido': '#e74c3c'        # Vermelho
         }
 
+        # (gráfico, fingerprint dos dados) -> figura pronta (LRU)
+        self.max_figuras_cache = max_figuras_cache
+        self._cache_figuras = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _figura_em_cache(self, nome_grafico, dados, construtor):
+        """Retorna a figura do cache ou a constrói a partir dos dados de entrada"""
+        chave = (nome_grafico, gerar_fingerprint(dados))
+
+        with self._lock:
+            fig = self._cache_figuras.get(chave)
+            if fig is not None:
+                self._cache_figuras.move_to_end(chave)
+                return fig
+
+        fig = construtor()
+
+        with self._lock:
+            self._cache_figuras[chave] = fig
+            self._cache_figuras.move_to_end(chave)
+            while len(self._cache_figuras) > self.max_figuras_cache:
+                self._cache_figuras.popitem(last=False)
+
+        return fig
+
     def criar_funil_vendas(self, kpis):
         """Cria o gráfico de funil de vendas"""
+        dados = sorted((chave, int(valor)) for chave, valor in kpis.items()
+                       if chave.startswith('funil_'))
+        return self._figura_em_cache(
+            'funil', dados, lambda: self._construir_funil_vendas(kpis))
+
+    def _construir_funil_vendas(self, kpis):
+        """Constrói a figura do funil de vendas"""
+        import plotly.graph_objects as go
+
         fig = go.Figure()
 
         # Dados do funil
@@ -45,19 +88,32 @@ class DashboardCharts:
 
     def criar_conversao_vendedor(self, df_vendedor):
         """Cria gráfico de taxa de conversão por vendedor"""
+        import plotly.graph_objects as go
+
         if df_vendedor.empty:
             return go.Figure()
 
-        fig = px.bar(
-            df_vendedor,
-            x='Vendedor',
-            y='Taxa_Conversao',
-            title='Taxa de Conversão por Vendedor (%)',
-            color='Taxa_Conversao',
-            color_continuous_scale='viridis'
-        )
+        return self._figura_em_cache(
+            'conversao_vendedor', df_vendedor[['Vendedor', 'Taxa_Conversao']],
+            lambda: self._construir_conversao_vendedor(df_vendedor))
+
+    def _construir_conversao_vendedor(self, df_vendedor):
+        """Constrói a figura de taxa de conversão por vendedor"""
+        import plotly.graph_objects as go
+
+        fig = go.Figure(go.Bar(
+            x=df_vendedor['Vendedor'],
+            y=df_vendedor['Taxa_Conversao'],
+            marker=dict(
+                color=df_vendedor['Taxa_Conversao'],
+                colorscale='Viridis',
+                showscale=True,
+                colorbar=dict(title='Taxa_Conversao')
+            )
+        ))
 
         fig.update_layout(
+            title='Taxa de Conversão por Vendedor (%)',
             xaxis_title="Vendedor",
             yaxis_title="Taxa de Conversão (%)",
             height=400
@@ -67,28 +123,53 @@ class DashboardCharts:
 
     def criar_pizza_status(self, df_filtrado):
         """Cria gráfico de pizza da distribuição de leads por status"""
+        import plotly.graph_objects as go
+
         if df_filtrado.empty:
             return go.Figure()
 
+        # A figura depende apenas das contagens, não do DataFrame inteiro
         status_counts = df_filtrado['Status_Categoria'].value_counts()
 
-        fig = px.pie(
+        return self._figura_em_cache(
+            'pizza_status', status_counts.reset_index(),
+            lambda: self._construir_pizza_status(status_counts))
+
+    def _construir_pizza_status(self, status_counts):
+        """Constrói a figura de pizza a partir das contagens por status"""
+        import plotly.graph_objects as go
+
+        fig = go.Figure(go.Pie(
             values=status_counts.values,
-            names=status_counts.index,
+            labels=status_counts.index,
+            marker=dict(colors=[self.cores.get(status)
+                                for status in status_counts.index])
+        ))
+
+        fig.update_layout(
             title='Distribuição de Leads por Status',
-            color=status_counts.index,
-            color_discrete_map=self.cores
+            height=400
         )
 
-        fig.update_layout(height=400)
-
         return fig
 
     def criar_performance_vendedor(self, df_vendedor):
         """Cria gráfico de performance por vendedor"""
+        import plotly.graph_objects as go
+
         if df_vendedor.empty:
             return go.Figure()
 
+        return self._figura_em_cache(
+            'performance_vendedor',
+            df_vendedor[['Vendedor', 'Total_Leads',
+                         'Vendas_Fechadas', 'Leads_Perdidos']],
+            lambda: self._construir_performance_vendedor(df_vendedor))
+
+    def _construir_performance_vendedor(self, df_vendedor):
+        """Constrói a figura de performance por vendedor"""
+        import plotly.graph_objects as go
+
         fig = go.Figure()
 
         # Total de leads
@@ -125,23 +206,66 @@ class DashboardCharts:
 
         return fig
 
-    def criar_leads_tempo(self, df_tempo):
+    def criar_leads_tempo(self, df_tempo, nivel='dia'):
         """Cria gráfico de leads criados ao longo do tempo"""
+        import plotly.graph_objects as go
+
         if df_tempo.empty:
             return go.Figure()
 
-        fig = px.line(
-            df_tempo,
-            x='Data',
-            y='Quantidade',
-            title='Leads Criados ao Longo do Tempo',
-            markers=True
-        )
+        return self._figura_em_cache(
+            f'leads_tempo_{nivel}', df_tempo[['Data', 'Quantidade']],
+            lambda: self._construir_leads_tempo(df_tempo, nivel))
+
+    def _construir_leads_tempo(self, df_tempo, nivel):
+        """Constrói a figura da série temporal já agregada no nível escolhido"""
+        import plotly.graph_objects as go
+
+        fig = go.Figure(go.Scatter(
+            x=df_tempo['Data'],
+            y=df_tempo['Quantidade'],
+            mode='lines+markers'
+        ))
 
         fig.update_layout(
+            title=f'Leads Criados ao Longo do Tempo (por {ROTULOS_NIVEL_TEMPO[nivel]})',
             xaxis_title="Data",
             yaxis_title="Quantidade de Leads",
             height=400
         )
 
         return fig
+
+    def criar_heatmap_coortes(self, matriz_conversao):
+        """Cria o heatmap de conversão por semana de criação e vendedor"""
+        import plotly.graph_objects as go
+
+        if matriz_conversao.empty:
+            return go.Figure()
+
+        return self._figura_em_cache(
+            'heatmap_coortes', matriz_conversao.reset_index(),
+            lambda: self._construir_heatmap_coortes(matriz_conversao))
+
+    def _construir_heatmap_coortes(self, matriz_conversao):
+        """Constrói o heatmap de coortes"""
+        import plotly.graph_objects as go
+
+        fig = go.Figure(go.Heatmap(
+            z=matriz_conversao.to_numpy(),
+            x=list(matriz_conversao.columns),
+            y=matriz_conversao.index.strftime('%d/%m/%Y'),
+            colorscale='Viridis',
+            colorbar=dict(title='Conversão (%)'),
+            hovertemplate='Semana de %{y}<br>%{x}: %{z:.1f}%<extra></extra>'
+        ))
+
+        fig.update_layout(
+            title='Conversão por Coorte Semanal de Criação (%)',
+            xaxis_title='Vendedor',
+            yaxis_title='Semana de Criação',
+            height=max(400, 22 * len(matriz_conversao)),
+            yaxis=dict(autorange='reversed')
+        )
+
+        return fig